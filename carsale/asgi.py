@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'carsale.settings')
+os.environ.setdefault('CARSALE_ASYNC_VIEWS', '1')
+os.environ.setdefault('CARSALE_DB_CONN_MAX_AGE', '0')
 
 application = get_asgi_application()
@@ -42,6 +42,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'main.middleware.QueryProfilingMiddleware',
+    'main.middleware.ReplicaRoutingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -54,7 +56,7 @@ ROOT_URLCONF = 'carsale.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'main.template_backends.ProfilingDjangoTemplates',
         'DIRS': [],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -87,6 +89,33 @@ DATABASES = {
     }
 }
 
+# Cache
+# Local memory keeps everything in-process with no external service; point
+# this at a shared backend (file, memcached, redis) when running several
+# worker processes so invalidations reach all of them.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'carsale',
+    }
+}
+
+# Seconds the admin dashboard counts may be served from cache; saves and
+# deletes of the counted models expire them straight away.
+ADMIN_STATS_CACHE_SECONDS = 300
+
+# Catalog facet counts (main.facets): age at which the precomputed counts of
+# the unfiltered catalog are refreshed, and how long filtered counts are cached
+CAR_FACETS_MAX_AGE = 60
+CAR_FACETS_CACHE_SECONDS = 60
+
+# Whole-page cache of the homepage for anonymous visitors (main.page_cache).
+# Car and company changes expire it straight away. Higher
+# PAGE_CACHE_EARLY_REFRESH rebuilds it earlier before expiry.
+HOME_PAGE_CACHE_SECONDS = 300
+PAGE_CACHE_EARLY_REFRESH = 1.0
+
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
 
@@ -128,8 +157,106 @@ import os
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Uploads are stored once per distinct content (main.storage)
+STORAGES = {
+    'default': {
+        'BACKEND': 'main.storage.ContentAddressedStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+}
+
 STATIC_URL = '/static/'
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
 
+# Threads used by `manage.py build_image_variants`
+IMAGE_VARIANT_WORKERS = 2
+
+# Background jobs (main.jobs): image variants, imports, company accounts and
+# renames wait in the database until `manage.py run_workers` picks them up.
+JOB_WORKERS = int(os.environ.get('CARSALE_JOB_WORKERS', '2'))  # Processes started by run_workers
+JOB_POLL_INTERVAL = 1  # Seconds an idle worker waits before looking again
+JOB_RETRY_DELAY = 10  # Seconds before the first retry, doubled for each further one
+JOB_TIMEOUT = 30 * 60  # Seconds after which a running job is presumed lost with its worker
+JOB_RETENTION_DAYS = 7  # Finished jobs are deleted after this; failed ones are kept
+
 LOGIN_URL = 'main:login'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Views decorated with main.query_budget.query_budget raise when they run more
+# queries than declared; outside of development they only log a warning.
+QUERY_BUDGET_STRICT = DEBUG
+
+# Serve home, car_list, car_detail and part_list from main.async_views.
+# carsale/asgi.py turns this on; under WSGI the sync views are cheaper.
+ASYNC_PUBLIC_VIEWS = os.environ.get('CARSALE_ASYNC_VIEWS', '0') == '1'
+
+# Where sessions live (main.sessions), picked with CARSALE_SESSION_TIER:
+#   db              every request with a session cookie reads its row
+#   cached_db       reads come from CACHES (use a shared backend when running
+#                   several processes), writes go to both cache and database
+#   signed_cookies  the whole session travels in a signed cookie; nothing is
+#                   stored server-side, and logout cannot revoke a copied cookie
+# All three skip writing a session whose data did not change, re-saving it
+# at most every SESSION_REFRESH_SECONDS to move its expiry on.
+SESSION_TIERS = {
+    'db': 'main.sessions.db',
+    'cached_db': 'main.sessions.cached_db',
+    'signed_cookies': 'main.sessions.signed_cookies',
+}
+SESSION_TIER = os.environ.get('CARSALE_SESSION_TIER', 'db')
+SESSION_ENGINE = SESSION_TIERS[SESSION_TIER]
+SESSION_REFRESH_SECONDS = 5 * 60
+
+# Minutes an unpaid car purchase keeps the car reserved for its buyer
+CAR_RESERVATION_MINUTES = 30
+
+# Per-view request profiling (main.middleware.QueryProfilingMiddleware).
+# Each process keeps the last PROFILING_WINDOW requests per URL name and
+# writes them to PROFILING_DUMP_DIR every PROFILING_FLUSH_EVERY requests;
+# dump_profile ignores dumps older than PROFILING_MAX_AGE seconds. Off
+# under `manage.py test` and `manage.py bench`.
+QUERY_PROFILING = True
+PROFILING_WINDOW = 1000
+PROFILING_FLUSH_EVERY = 200
+PROFILING_MAX_AGE = 15 * 60
+PROFILING_DUMP_DIR = os.path.join(BASE_DIR, 'profiling')
+TEST_RUNNER = 'main.test_runner.TestRunner'
+
+# Persistent database connections. Each worker thread keeps its connection
+# for CARSALE_DB_CONN_MAX_AGE seconds (0 = a new one per request) and checks
+# it is still alive before the first query of a request. At most
+# DB_MAX_CONNECTIONS_PER_WORKER stay open per process (main.db_pool); 0
+# lifts the cap. carsale/asgi.py defaults to 0 seconds, since ASGI runs
+# each request on a fresh thread that could never reuse a connection.
+DB_CONN_MAX_AGE = int(os.environ.get('CARSALE_DB_CONN_MAX_AGE', '60'))
+DB_MAX_CONNECTIONS_PER_WORKER = int(os.environ.get('CARSALE_DB_MAX_CONNECTIONS', '8'))
+DATABASES['default'].update(CONN_MAX_AGE=DB_CONN_MAX_AGE, CONN_HEALTH_CHECKS=True)
+
+# Read replicas (main.routers.ReplicaRouter). CARSALE_DB_REPLICAS is a
+# comma-separated list of host[:port] sharing the primary's database name
+# and credentials. Entries of the form sqlite:<path> use an SQLite file,
+# e.g. a copy of a local SQLite primary, to try the routing without MySQL.
+REPLICA_DATABASES = []
+for number, address in enumerate(filter(None, os.environ.get('CARSALE_DB_REPLICAS', '').split(',')), 1):
+    alias = f'replica{number}'
+    if address.startswith('sqlite:'):
+        DATABASES[alias] = {'ENGINE': 'django.db.backends.sqlite3', 'NAME': address[len('sqlite:'):],
+                            'CONN_MAX_AGE': DB_CONN_MAX_AGE, 'CONN_HEALTH_CHECKS': True}
+    else:
+        host, _, port = address.partition(':')
+        DATABASES[alias] = dict(DATABASES['default'], HOST=host, PORT=port or DATABASES['default']['PORT'])
+    DATABASES[alias]['TEST'] = {'MIRROR': 'default'}
+    REPLICA_DATABASES.append(alias)
+
+DATABASE_ROUTERS = ['main.routers.ReplicaRouter']
+
+# URL names whose GET requests may read from a replica, and how long a
+# browser stays on the primary after one of its requests wrote something
+REPLICA_READ_VIEWS = {
+    'main:home', 'main:car_list', 'main:car_detail', 'main:part_list',
+    'main:admin_all_purchases', 'main:admin_all_part_orders',
+    'main:admin_export_purchases', 'main:admin_export_part_orders',
+}
+REPLICA_STICKY_SECONDS = 15
@@ -1,6 +1,7 @@
 from django.contrib import admin
+from django.utils import timezone
 from .models import (Car, Part, TestDrive, LoanApplication, Cart, CartItem, 
-                     Company, CompanyRequest, CarPurchase, PartOrder, PartOrderItem)
+                     Company, CompanyRequest, CarPurchase, PartOrder, PartOrderItem, Job)
 
 @admin.register(CompanyRequest)
 class CompanyRequestAdmin(admin.ModelAdmin):
@@ -15,13 +16,13 @@ class CompanyAdmin(admin.ModelAdmin):
 
 @admin.register(Car)
 class CarAdmin(admin.ModelAdmin):
-    list_display = ['company', 'model', 'year', 'price', 'status', 'created_at']
+    list_display = ['company_name', 'model', 'year', 'price', 'status', 'created_at']
     list_filter = ['status', 'fuel_type', 'company']
-    search_fields = ['model', 'company__name']
+    search_fields = ['model', 'company_name']
 
 @admin.register(Part)
 class PartAdmin(admin.ModelAdmin):
-    list_display = ['name', 'company', 'category', 'price', 'stock']
+    list_display = ['name', 'company_name', 'category', 'price', 'stock', 'compatible_cars_count']
     list_filter = ['company', 'category']
     search_fields = ['name', 'category']
 
@@ -49,5 +50,17 @@ class PartOrderAdmin(admin.ModelAdmin):
 class PartOrderItemAdmin(admin.ModelAdmin):
     list_display = ['order', 'part', 'quantity', 'price']
 
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'task', 'status', 'attempts', 'run_at', 'locked_by', 'finished_at']
+    list_filter = ['status', 'task']
+    actions = ['retry']
+
+    @admin.action(description='Retry selected failed jobs')
+    def retry(self, request, queryset):
+        count = queryset.filter(status='failed').update(status='queued', attempts=0, run_at=timezone.now(),
+                                                        finished_at=None)
+        self.message_user(request, f'{count} job(s) queued again.')
+
 admin.site.register(Cart)
 admin.site.register(CartItem)
\ No newline at end of file
@@ -0,0 +1,118 @@
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.http import HttpResponse
+from django.shortcuts import aget_object_or_404, render
+
+from .facets import car_facet_counts, filter_q, parse_filters, present_facets
+from .models import Car, Company, Part
+from .page_cache import home_page, is_cacheable
+from .pagination import KeysetPage, page_querystring, pick_sort, sort_choices
+from .query_budget import query_budget
+from .search import annotate_rank, filter_matches, rank_matches
+from .views import (CAR_DETAIL_PARTS, CAR_ORDERING, CAR_PAGE_SIZE, CAR_SEARCH_SORTS, CAR_SORTS, PART_PAGE_SIZE,
+                    PART_SEARCH_SORTS, PART_SORTS)
+
+# Async versions of the public read pages in views.py, routed instead of
+# them when ASYNC_PUBLIC_VIEWS is on (see carsale/asgi.py). Everything the
+# templates touch is loaded up front: rendering runs on the event loop, where
+# a lazy query would raise SynchronousOnlyOperation.
+
+
+async def _load_user(request):
+    # request.user is lazy, and the navbar reads user.company
+    user = await request.auser()
+    if user.is_authenticated:
+        user = await User.objects.select_related('company').aget(pk=user.pk)
+    request.user = user
+
+
+@query_budget(6)
+async def home(request):
+    await _load_user(request)
+    if is_cacheable(request):
+        return HttpResponse(await home_page.aget(lambda: _home_content(request)))
+    return await _render_home(request)
+
+
+async def _home_content(request):
+    return (await _render_home(request)).content
+
+
+async def _render_home(request):
+    featured_cars = Car.objects.filter(status='available').order_by(*CAR_ORDERING)[:6]
+    companies = Company.objects.all()[:4]
+    return render(request, 'main/home.html', {
+        'featured_cars': [car async for car in featured_cars.aiterator()],
+        'companies': [company async for company in companies.aiterator()],
+    })
+
+
+@query_budget(8)
+async def car_list(request):
+    await _load_user(request)
+    cars = Car.objects.filter(status='available')
+
+    search_query = request.GET.get('search', '')
+    if search_query:
+        cars = filter_matches(cars, 'car', search_query)
+
+    filters = parse_filters(request.GET)
+    counts = await sync_to_async(car_facet_counts)(cars, filters, search_query)
+    if filters:
+        cars = cars.filter(filter_q(filters))
+
+    sorts = CAR_SORTS
+    if search_query:
+        cars = annotate_rank(cars, 'car', search_query)
+        sorts = CAR_SEARCH_SORTS
+    sort, ordering = pick_sort(sorts, request.GET.get('sort'))
+    page = KeysetPage(cars, ordering, CAR_PAGE_SIZE,
+                      after=request.GET.get('after'), before=request.GET.get('before'))
+    page.finish([car async for car in page.queryset.aiterator()])
+
+    return render(request, 'main/car_list.html', {
+        'cars': page,
+        'page': page,
+        'page_query': page_querystring(request),
+        'sort_choices': sort_choices(sorts, sort),
+        'facets': present_facets(counts, filters, request.GET),
+        'total': counts['total'],
+        'filtered': bool(filters or search_query),
+        'search_query': search_query,
+    })
+
+
+@query_budget(5)
+async def car_detail(request, pk):
+    await _load_user(request)
+    car = await aget_object_or_404(Car, pk=pk)
+    parts = Part.objects.filter(company_id=car.company_id).order_by('-created_at', '-id')[:CAR_DETAIL_PARTS]
+    return render(request, 'main/car_detail.html', {
+        'car': car,
+        'parts': [part async for part in parts.aiterator()],
+    })
+
+
+@query_budget(5)
+async def part_list(request):
+    await _load_user(request)
+    parts = Part.objects.all()
+
+    search_query = request.GET.get('search', '')
+    sorts = PART_SORTS
+    if search_query:
+        parts = rank_matches(parts, 'part', search_query)
+        sorts = PART_SEARCH_SORTS
+
+    sort, ordering = pick_sort(sorts, request.GET.get('sort'))
+    page = KeysetPage(parts, ordering, PART_PAGE_SIZE,
+                      after=request.GET.get('after'), before=request.GET.get('before'))
+    page.finish([part async for part in page.queryset.aiterator()])
+
+    return render(request, 'main/part_list.html', {
+        'parts': page,
+        'page': page,
+        'page_query': page_querystring(request),
+        'sort_choices': sort_choices(sorts, sort),
+        'search_query': search_query,
+    })
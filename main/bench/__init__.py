@@ -0,0 +1,6 @@
+# Benchmark scenarios for `manage.py bench <name>`, one module per scenario.
+# Importing a module registers its scenario in SCENARIOS; the shared timing
+# and synthetic-data helpers live in base.
+from . import asgi, checkout, connections, facets, home_cache, imports, jobs, reservation, search, sessions, sort, urls
+from .base import SCENARIOS
+from .seed import flush_bench_data, seed_bench_data
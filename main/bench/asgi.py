@@ -0,0 +1,80 @@
+import asyncio
+import time
+from types import ModuleType
+
+from asgiref.sync import ThreadSensitiveContext, sync_to_async
+from django.core.management.base import CommandError
+from django.db import connections
+from django.test import AsyncClient, Client
+from django.urls import get_resolver, include, path
+
+from .. import async_views, views
+from ..models import Car
+from .base import client_settings, ms_since, run_threads, scenario, summarize
+
+# Sync views under WSGI vs async views under ASGI
+ASYNC_VIEWS = ('home', 'car_list', 'car_detail', 'part_list')
+
+
+def _urlconf(module):
+    # main.urls with the public read pages taken from `module`
+    patterns = [
+        path(str(pattern.pattern), getattr(module, pattern.name), name=pattern.name)
+        if getattr(pattern, 'name', None) in ASYNC_VIEWS else pattern
+        for pattern in get_resolver('main.urls').url_patterns
+    ]
+    urlconf = ModuleType(f'bench_urls_{module.__name__}')
+    urlconf.urlpatterns = [path('', include((patterns, 'main')))]
+    return urlconf
+
+
+@scenario('asgi')
+def bench_asgi(iterations=50, concurrency=64, **options):
+    """Public read pages with `concurrency` requests in flight: the sync
+    views on a WSGI-style thread pool vs the async views on one event loop.
+    `iterations` requests per page in each mode.
+    """
+    car = Car.objects.filter(status='available').values_list('pk', flat=True).first()
+    if car is None:
+        raise CommandError('No cars found; run `manage.py seed_bench` first.')
+    paths = ['/', '/cars/', f'/cars/{car}/', '/parts/'] * iterations
+
+    def wsgi():
+        def get(path):
+            start = time.perf_counter()
+            response = Client(raise_request_exception=False).get(path)
+            return response.status_code, ms_since(start)
+
+        return run_threads(get, paths, concurrency)
+
+    async def asgi():
+        client = AsyncClient(raise_request_exception=False)
+        slots = asyncio.Semaphore(concurrency)
+
+        async def get(path):
+            # Like the ASGI handler, give each request its own sync thread
+            async with slots, ThreadSensitiveContext():
+                start = time.perf_counter()
+                response = await client.get(path)
+                elapsed = ms_since(start)
+                await sync_to_async(connections.close_all)()
+            return response.status_code, elapsed
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*(get(path) for path in paths))
+        return results, time.perf_counter() - start
+
+    results = {'concurrency': concurrency, 'requests': len(paths)}
+    for mode, module, run in [('wsgi_sync', views, wsgi), ('asgi_async', async_views, lambda: asyncio.run(asgi()))]:
+        with client_settings(ROOT_URLCONF=_urlconf(module)):
+            responses, elapsed = run()
+        statuses = {}
+        for status, _ in responses:
+            statuses[status] = statuses.get(status, 0) + 1
+        results[mode] = {
+            'status_codes': statuses,
+            'elapsed_s': round(elapsed, 3),
+            'requests_per_sec': round(len(responses) / elapsed, 1),
+            'latency_ms': summarize([ms for _, ms in responses]),
+        }
+    return results
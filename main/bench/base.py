@@ -0,0 +1,136 @@
+import random
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.test import override_settings
+
+from ..models import Car, Company
+from ..query_budget import execute_wrapper
+
+# Shared by the scenario modules: the registry, timing and statistics, and
+# synthetic data. Each scenario returns a JSON-serialisable dict; timings
+# are in milliseconds.
+SCENARIOS = {}
+
+MODELS = ['Civic', 'Accord', 'Corolla', 'Camry', 'Focus', 'Mustang', 'Golf', 'Polo', 'Swift', 'City']
+COLORS = ['red', 'blue', 'black', 'white', 'silver', 'grey', 'green']
+FUEL_TYPES = ['petrol', 'diesel', 'electric', 'hybrid']
+
+
+def scenario(name):
+    def register(func):
+        SCENARIOS[name] = func
+        return func
+    return register
+
+
+# ---------- Timing ----------
+def percentile(samples, pct):
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(samples):
+    return {
+        'n': len(samples),
+        'mean': round(sum(samples) / len(samples), 3) if samples else None,
+        'p50': percentile(samples, 50),
+        'p95': percentile(samples, 95),
+        'p99': percentile(samples, 99),
+    }
+
+
+def ms_since(start):
+    return round((time.perf_counter() - start) * 1000, 3)
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    func(*args, **kwargs)
+    return ms_since(start)
+
+
+def run_threads(worker, args, concurrency):
+    # Every thread gets its own DB connection; close it so none leak
+    def run(arg):
+        try:
+            return worker(arg)
+        finally:
+            connection.close()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(run, args))
+    return results, time.perf_counter() - start
+
+
+@contextmanager
+def counting_queries(classify=lambda sql: 'queries'):
+    """Count the queries run inside the block, on every database, by the
+    key classify(sql) returns for each (None skips it).
+    """
+    counts = Counter()
+
+    def count(execute, sql, params, many, context):
+        key = classify(sql)
+        if key:
+            counts[key] += 1
+        return execute(sql, params, many, context)
+
+    with execute_wrapper(count):
+        yield counts
+
+
+def client_settings(**overrides):
+    # The test client's host, plus whatever the scenario varies
+    return override_settings(ALLOWED_HOSTS=['testserver'], **overrides)
+
+
+# ---------- Synthetic data ----------
+@contextmanager
+def throwaway_data():
+    # Synthetic rows live inside one transaction that is always rolled back
+    with transaction.atomic():
+        yield
+        transaction.set_rollback(True)
+
+
+@contextmanager
+def committed_data(company_name, username_prefix, users):
+    """A company and `users` users committed for other threads to see, and
+    deleted again (with everything hanging off them) afterwards.
+    """
+    company = Company.objects.create(name=company_name, country='Benchland')
+    accounts = User.objects.bulk_create([User(username=f'{username_prefix}{i}') for i in range(users)])
+    try:
+        yield company, accounts
+    finally:
+        User.objects.filter(pk__in=[user.pk for user in accounts]).delete()
+        company.delete()
+
+
+def random_car(rng, companies):
+    maker = rng.choice(companies)
+    return Car(company=maker, company_name=maker.name, model=rng.choice(MODELS), year=rng.randint(2000, 2025),
+               price=Decimal(rng.randint(3000, 90000)), color=rng.choice(COLORS), fuel_type=rng.choice(FUEL_TYPES),
+               mileage=rng.randint(0, 250000), description='Synthetic benchmark car')
+
+
+def make_cars(count, companies=20, batch_size=2000, owners=None):
+    """Bulk-create `count` random cars, for new companies or for `owners`."""
+    if owners is None:
+        owners = Company.objects.bulk_create(
+            [Company(name=f'Bench Motors {i}', country='Benchland') for i in range(companies)]
+        )
+    rng = random.Random(count)
+    for start in range(0, count, batch_size):
+        Car.objects.bulk_create([random_car(rng, owners) for _ in range(min(batch_size, count - start))])
+    return owners
@@ -0,0 +1,54 @@
+import random
+import time
+from decimal import Decimal
+
+from ..models import Cart, CartItem, Part
+from ..services import OutOfStock, checkout_cart
+from .base import committed_data, ms_since, run_threads, scenario, summarize
+
+
+@scenario('checkout')
+def bench_checkout(rows=10000, iterations=50, concurrency=8, **options):
+    """Concurrent checkout_cart() throughput; `rows` is the stock per part.
+
+    Threads need committed data, so the rows are created up front and
+    deleted again at the end instead of being rolled back.
+    """
+    with committed_data('Bench Parts Co', 'bench_checkout_', concurrency) as (company, users):
+        parts = Part.objects.bulk_create([
+            Part(company=company, company_name=company.name, name=f'Bench part {i}', category='bench', price=Decimal('9.99'),
+                 stock=rows, description='Synthetic benchmark part')
+            for i in range(20)
+        ])
+
+        def worker(user):
+            rng = random.Random(user.pk)
+            cart = Cart.objects.create(user=user)
+            samples, rejected = [], 0
+            for _ in range(iterations):
+                CartItem.objects.bulk_create([
+                    CartItem(cart=cart, part=part, quantity=rng.randint(1, 3))
+                    for part in rng.sample(parts, 3)
+                ])
+                start = time.perf_counter()
+                try:
+                    checkout_cart(cart, 'cash', 'Benchmark street 1')
+                except OutOfStock:
+                    rejected += 1
+                    cart.cartitem_set.all().delete()
+                samples.append(ms_since(start))
+            return samples, rejected
+
+        results, elapsed = run_threads(worker, users, concurrency)
+        samples = [sample for worker_samples, _ in results for sample in worker_samples]
+        rejected = sum(worker_rejected for _, worker_rejected in results)
+        oversold = Part.objects.filter(company=company, stock__lt=0).count()
+        return {
+            'concurrency': concurrency,
+            'checkouts': len(samples) - rejected,
+            'rejected_out_of_stock': rejected,
+            'oversold_parts': oversold,
+            'elapsed_s': round(elapsed, 3),
+            'checkouts_per_sec': round(len(samples) / elapsed, 1),
+            'latency_ms': summarize(samples),
+        }
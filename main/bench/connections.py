@@ -0,0 +1,49 @@
+import time
+
+from django.core.signals import request_finished, request_started
+from django.db import connection, connections
+
+from .. import db_pool
+from ..models import Car
+from .base import ms_since, run_threads, scenario, summarize
+
+
+@scenario('connections')
+def bench_connections(iterations=50, concurrency=8, **options):
+    """Opening a database connection for every request (CONN_MAX_AGE=0) vs
+    persistent connections, with and without health checks. Each of
+    `concurrency` threads runs `iterations` request cycles of one query.
+    """
+    database = connections.settings['default']
+    original = {key: database.get(key) for key in ('CONN_MAX_AGE', 'CONN_HEALTH_CHECKS')}
+
+    def requests(_):
+        samples = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            request_started.send(sender=None)
+            Car.objects.filter(status='available').exists()
+            request_finished.send(sender=None)
+            samples.append(ms_since(start))
+        return samples
+
+    results = {'concurrency': concurrency, 'engine': database['ENGINE'].rsplit('.', 1)[-1]}
+    try:
+        for mode, max_age, health_checks in [('per_request', 0, False), ('persistent', 60, False),
+                                             ('persistent_health_checked', 60, True)]:
+            database.update(CONN_MAX_AGE=max_age, CONN_HEALTH_CHECKS=health_checks)
+            connection.close()
+            before = db_pool.snapshot()
+            batches, elapsed = run_threads(requests, range(concurrency), concurrency)
+            after = db_pool.snapshot()
+            samples = [sample for batch in batches for sample in batch]
+            results[mode] = {
+                'connections_opened': after['opened'] - before['opened'],
+                'closed_over_limit': after['closed_over_limit'] - before['closed_over_limit'],
+                'requests_per_sec': round(len(samples) / elapsed, 1),
+                'latency_ms': summarize(samples),
+            }
+    finally:
+        database.update(original)
+        connection.close()
+    return results
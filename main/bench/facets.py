@@ -0,0 +1,46 @@
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import Client
+
+from .. import facets
+from ..models import Car, FacetCounts
+from .base import client_settings, make_cars, scenario, summarize, throwaway_data, timed
+
+FACET_SELECTIONS = [
+    {},
+    {'fuel_type': ['diesel']},
+    {'fuel_type': ['electric', 'hybrid'], 'price': (Decimal(10000), Decimal('39999.99'))},
+    {'color': ['red'], 'year': (2015, None), 'mileage': (None, 49999)},
+]
+
+
+@scenario('facets')
+def bench_facets(rows=10000, iterations=50, **options):
+    """Catalog facet counts on `rows` cars: building the precomputed
+    snapshot (a background job), reading it (the unfiltered page), counting
+    live for a few selections, and the car_list page with filters on a cold
+    and a warm facet cache.
+    """
+    results = {'rows': rows}
+    with throwaway_data(), client_settings():
+        make_cars(rows, companies=max(20, rows // 5000))
+        available = Car.objects.filter(status='available')
+        results['refresh_snapshot_ms'] = timed(facets.refresh_snapshot)
+        results['snapshot_read'] = summarize([
+            timed(lambda: FacetCounts.objects.get(name=facets.SNAPSHOT_NAME).counts) for _ in range(iterations)
+        ])
+        for selection in FACET_SELECTIONS[1:]:
+            name = 'live_' + '_'.join(sorted(selection))
+            results[name] = summarize([timed(facets.count_facets, available, selection)
+                                       for _ in range(max(1, iterations // 5))])
+
+        client = Client()
+        query = {'fuel_type': 'diesel', 'price_min': '10000', 'price_max': '39999.99'}
+        cold, warm = [], []
+        for _ in range(max(1, iterations // 5)):
+            cache.clear()
+            cold.append(timed(client.get, '/cars/', query))
+            warm.append(timed(client.get, '/cars/', query))
+        results['car_list_filtered'] = {'cold': summarize(cold), 'warm': summarize(warm)}
+    return results
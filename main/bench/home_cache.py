@@ -0,0 +1,36 @@
+import time
+
+from django.conf import settings
+from django.test import Client, override_settings
+
+from ..page_cache import home_page
+from .base import client_settings, counting_queries, ms_since, run_threads, scenario, summarize, timed
+
+
+@scenario('home_cache')
+def bench_home_cache(iterations=50, concurrency=8, **options):
+    """Anonymous homepage visits in waves of `concurrency` requests, each
+    wave arriving just after the cached page expired: how many requests of
+    a wave rebuild the page and how long they take, with the page cache
+    off (every visit renders) and on.
+    """
+    def visit(_):
+        client = Client()
+        start = time.perf_counter()
+        with counting_queries(lambda sql: 'main_car' in sql and 'car_queries') as counts:
+            client.get('/')
+        return ms_since(start), counts['car_queries']
+
+    results = {'concurrency': concurrency}
+    with client_settings():
+        for name, timeout in [('uncached', 0), ('cached', settings.HOME_PAGE_CACHE_SECONDS)]:
+            samples, rebuilds = [], 0
+            with override_settings(HOME_PAGE_CACHE_SECONDS=timeout):
+                for _ in range(iterations):
+                    home_page.invalidate()
+                    wave, _ = run_threads(visit, range(concurrency), concurrency)
+                    samples += [ms for ms, _ in wave]
+                    rebuilds += sum(queries for _, queries in wave)
+            results[name] = {'latency': summarize(samples), 'rebuilds_per_wave': rebuilds / iterations}
+        results['cached_hit'] = summarize([timed(Client().get, '/') for _ in range(iterations)])
+    return results
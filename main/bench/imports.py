@@ -0,0 +1,71 @@
+import csv
+import io
+import random
+
+from django.core.files.base import ContentFile
+from django.core.management.base import CommandError
+
+from ..forms import CarForm
+from ..imports import run_import
+from ..models import Company, ImportJob
+from .base import COLORS, FUEL_TYPES, MODELS, scenario, throwaway_data, timed
+
+
+def _import_file(header, rows, name):
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(header)
+    writer.writerows(rows)
+    return ContentFile(out.getvalue().encode(), name=name)
+
+
+@scenario('import')
+def bench_import(rows=5000, **options):
+    """Bulk CSV import vs adding the same cars one CarForm at a time (the
+    company_car_add path), then re-importing the cars with new prices and
+    unchanged, and importing parts that link to the cars. Reports rows/sec.
+    """
+    rng = random.Random(rows)
+    car_rows = [[f'BENCH-CAR-{i}', rng.choice(MODELS), rng.randint(2000, 2025), rng.randint(3000, 90000),
+                 rng.choice(COLORS), rng.choice(FUEL_TYPES),
+                 rng.randint(0, 250000), 'Synthetic benchmark car'] for i in range(rows)]
+    car_header = ['sku', 'model', 'year', 'price', 'color', 'fuel_type', 'mileage', 'description']
+    repriced_rows = [row[:3] + [row[3] + 100] + row[4:] for row in car_rows]
+    part_rows = [[f'BENCH-PART-{i}', f'Bench part {i}', 'Brakes', rng.randint(5, 500), rng.randint(0, 100),
+                  'Synthetic benchmark part', ';'.join(f'BENCH-CAR-{rng.randrange(rows)}' for _ in range(3))] for i in range(rows)]
+    part_header = ['sku', 'name', 'category', 'price', 'stock', 'description', 'compatible_cars']
+
+    results = {'rows': rows}
+    jobs = []
+    try:
+        with throwaway_data():
+            company = Company.objects.create(name='Bench Imports', country='Benchland')
+
+            def one_at_a_time():
+                for row in car_rows:
+                    form = CarForm(dict(zip(car_header[1:], row[1:])))
+                    car = form.save(commit=False)
+                    car.company = company
+                    car.save()
+
+            def import_file(kind, header, data):
+                job = ImportJob.objects.create(company=company, kind=kind,
+                                               file=_import_file(header, data, f'bench-{kind}s.csv'))
+                jobs.append(job)
+                run_import(job)
+                if job.status != 'done' or job.error_count:
+                    raise CommandError(f'{kind} import failed: {job.message or job.errors[:5]}')
+
+            with throwaway_data():
+                elapsed = timed(one_at_a_time)
+            results['car_form_per_row'] = {'ms': elapsed, 'rows_per_sec': round(rows / elapsed * 1000, 1)}
+            for name, kind, header, data in [('car_import_create', 'car', car_header, car_rows),
+                                             ('car_import_update', 'car', car_header, repriced_rows),
+                                             ('car_import_unchanged', 'car', car_header, repriced_rows),
+                                             ('part_import_with_links', 'part', part_header, part_rows)]:
+                elapsed = timed(import_file, kind, header, data)
+                results[name] = {'ms': elapsed, 'rows_per_sec': round(rows / elapsed * 1000, 1)}
+    finally:
+        for job in jobs:
+            job.file.delete(save=False)
+    return results
@@ -0,0 +1,92 @@
+import io
+import time
+
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import CommandError
+from django.db.models import Max
+from django.test import Client
+from PIL import Image as PILImage
+
+from .. import images
+from ..jobs import run_job
+from ..models import Car, Company, CompanyRequest, Job
+from .base import client_settings, make_cars, ms_since, scenario, summarize, throwaway_data, timed
+from .seed import BENCH_PASSWORD
+
+
+def _run_jobs_after(pk):
+    # Only the jobs this scenario queued, never real ones waiting in the table
+    for job in Job.objects.filter(pk__gt=pk, status='queued').order_by('pk'):
+        job.attempts += 1
+        run_job(job)
+
+
+def _image_upload(i):
+    buffer = io.BytesIO()
+    PILImage.new('RGB', (1600, 1200), (i * 37 % 256, i * 91 % 256, 128)).save(buffer, 'JPEG')
+    return ContentFile(buffer.getvalue(), name=f'bench-{i}.jpg')
+
+
+@scenario('jobs')
+def bench_jobs(iterations=30, rows=2000, **options):
+    """Latency of requests whose slow side effects now go through the job
+    queue: approving a company request (password hashing), renaming a
+    dealer with `rows` cars, and uploading a car image. `queued` is the
+    request alone; `inline` adds the time the worker then spends on the
+    jobs it queued, which the request used to pay itself.
+    """
+    results = {'iterations': iterations, 'rows': rows}
+    uploaded = []
+    try:
+        with throwaway_data(), client_settings():
+            admin = User.objects.create_user('bench_jobs_admin', is_staff=True)
+            dealer = User.objects.create_user('bench_jobs_dealer')
+            company = Company.objects.create(user=dealer, name='Bench Jobs Motors', country='Benchland')
+            make_cars(rows, owners=[company])
+            car = Car.objects.filter(company=company).first()
+            admin_client, dealer_client = Client(), Client()
+            admin_client.force_login(admin)
+            dealer_client.force_login(dealer)
+
+            def approve(i):
+                company_request = CompanyRequest.objects.create(
+                    company_name=f'Bench Request {i}', country='Benchland', contact_email='bench@example.com',
+                    requested_username=f'bench_jobs_request_{i}', requested_password=BENCH_PASSWORD)
+                return admin_client.post(f'/dashboard/company-requests/{company_request.pk}/review/',
+                                         {'action': 'approve'})
+
+            def rename(i):
+                return admin_client.post(f'/dashboard/companies/edit/{company.pk}/',
+                                         {'name': f'Bench Jobs Motors {i}', 'country': 'Benchland'})
+
+            def upload(i):
+                response = dealer_client.post(f'/company/cars/edit/{car.pk}/', {
+                    'model': car.model, 'year': car.year, 'price': car.price, 'color': car.color,
+                    'fuel_type': car.fuel_type, 'mileage': car.mileage, 'description': car.description,
+                    'image': _image_upload(i),
+                })
+                uploaded.append(Car.objects.values_list('image', flat=True).get(pk=car.pk))
+                return response
+
+            for name, request in [('approve_company', approve), ('rename_company', rename),
+                                  ('upload_car_image', upload)]:
+                queued, inline = [], []
+                for i in range(iterations):
+                    last_job = Job.objects.aggregate(last=Max('pk'))['last'] or 0
+                    start = time.perf_counter()
+                    response = request(i)
+                    request_ms = ms_since(start)
+                    if response.status_code != 302:
+                        raise CommandError(f'{name} answered {response.status_code}')
+                    job_ms = timed(_run_jobs_after, last_job)
+                    queued.append(request_ms)
+                    inline.append(round(request_ms + job_ms, 3))
+                results[name] = {'queued': summarize(queued), 'inline': summarize(inline)}
+    finally:
+        for name in uploaded:
+            images.delete_variants(name)
+            if default_storage.exists(name):
+                default_storage.delete(name)
+    return results
@@ -0,0 +1,38 @@
+import time
+from decimal import Decimal
+
+from ..models import Car, CarPurchase
+from ..services import CarUnavailable, reserve_car
+from .base import committed_data, ms_since, run_threads, scenario, summarize
+
+
+@scenario('reservation')
+def bench_reservation(iterations=50, concurrency=8, **options):
+    """Stress test: `concurrency` threads race to reserve the same car,
+    `iterations` rounds in a row. Every round must have exactly one winner.
+    """
+    with committed_data('Bench Reservations Co', 'bench_reserve_', concurrency) as (company, users):
+        rounds, samples = [], []
+        for _ in range(iterations):
+            car = Car.objects.create(company=company, model='Contested', year=2024, price=Decimal('20000'),
+                                     color='red', fuel_type='petrol', mileage=0, description='Synthetic')
+
+            def attempt(user):
+                start = time.perf_counter()
+                try:
+                    reserve_car(Car.objects.get(pk=car.pk), user, 'cash')
+                    won = True
+                except CarUnavailable:
+                    won = False
+                return won, ms_since(start)
+
+            results, _ = run_threads(attempt, users, concurrency)
+            samples += [ms for _, ms in results]
+            rounds.append((sum(won for won, _ in results), CarPurchase.objects.filter(car=car).count()))
+        return {
+            'concurrency': concurrency,
+            'rounds': iterations,
+            'rounds_with_exactly_one_winner': sum(1 for winners, purchases in rounds if winners == purchases == 1),
+            'double_sold_rounds': sum(1 for winners, purchases in rounds if winners > 1 or purchases > 1),
+            'attempt_latency_ms': summarize(samples),
+        }
@@ -0,0 +1,30 @@
+from django.db.models import Q
+
+from ..models import Car
+from ..search import filter_matches, rebuild_index
+from .base import make_cars, scenario, summarize, throwaway_data, timed
+
+SEARCH_TERMS = ['civic', 'red', 'mustang blue', 'bench', 'gol', 'silver polo', 'nomatch']
+
+
+@scenario('search')
+def bench_search(rows=10000, iterations=50, **options):
+    """Token-index search vs the old icontains scan on the car catalog."""
+    with throwaway_data():
+        make_cars(rows)
+        rebuild_index()
+        available = Car.objects.filter(status='available').order_by('-created_at', '-id')
+
+        def icontains(term):
+            list(available.filter(
+                Q(model__icontains=term) | Q(company__name__icontains=term) | Q(color__icontains=term)
+            )[:12])
+
+        def token_index(term):
+            list(filter_matches(available, 'car', term)[:12])
+
+        results = {'rows': rows}
+        for name, func in [('icontains', icontains), ('token_index', token_index)]:
+            samples = [timed(func, SEARCH_TERMS[i % len(SEARCH_TERMS)]) for i in range(iterations)]
+            results[name] = summarize(samples)
+    return results
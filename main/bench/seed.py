@@ -0,0 +1,114 @@
+import datetime
+import random
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+
+from ..models import (Car, CarPurchase, Cart, CartItem, Company, CompanyRequest, LoanApplication, Part, PartOrder,
+                      PartOrderItem, TestDrive)
+from ..search import rebuild_index
+from ..stats import rebuild_company_stats, refresh_compatible_cars_counts
+from .base import random_car
+
+# Synthetic data for `manage.py seed_bench`, which the urls and asgi
+# scenarios run against
+BENCH_PREFIX = 'bench_'
+BENCH_PASSWORD = 'bench-password'
+SEED_VOLUMES = {
+    'companies': 20,
+    'cars': 1000,
+    'parts': 500,
+    'users': 200,
+    'test_drives': 500,
+    'loans': 300,
+    'car_purchases': 200,
+    'part_orders': 300,
+    'company_requests': 20,
+}
+
+
+def flush_bench_data():
+    User.objects.filter(username__startswith=BENCH_PREFIX).delete()
+    Company.objects.filter(name__startswith='Bench ').delete()
+    CompanyRequest.objects.filter(requested_username__startswith=BENCH_PREFIX).delete()
+
+
+def seed_bench_data(scale=1, seed=0, batch_size=2000):
+    """Bulk-insert a realistic catalog; returns the row counts created.
+
+    Three accounts can log in with BENCH_PASSWORD: bench_admin (staff),
+    bench_company (owns the first company) and bench_user.
+    """
+    rng = random.Random(seed)
+    volumes = {name: max(1, int(count * scale)) for name, count in SEED_VOLUMES.items()}
+    now = datetime.datetime.now(datetime.timezone.utc)
+
+    def bulk(model, objects):
+        return model.objects.bulk_create(objects, batch_size=batch_size)
+
+    admin = User.objects.create_user(f'{BENCH_PREFIX}admin', password=BENCH_PASSWORD, is_staff=True)
+    owner = User.objects.create_user(f'{BENCH_PREFIX}company', password=BENCH_PASSWORD)
+    buyer = User.objects.create_user(f'{BENCH_PREFIX}user', password=BENCH_PASSWORD)
+    users = [buyer] + bulk(User, [
+        User(username=f'{BENCH_PREFIX}user_{i}', email=f'user{i}@bench.example', password='!')
+        for i in range(volumes['users'])
+    ])
+
+    companies = bulk(Company, [
+        Company(user=owner if i == 0 else None, name=f'Bench Motors {i}', country='Benchland',
+                description='Synthetic benchmark company', established_year=rng.randint(1900, 2020))
+        for i in range(volumes['companies'])
+    ])
+    cars = bulk(Car, [random_car(rng, companies) for _ in range(volumes['cars'])])
+    parts = bulk(Part, [
+        Part(company=(maker := rng.choice(companies)), company_name=maker.name, name=f'{rng.choice(["Brake pad", "Filter", "Wiper", "Bulb", "Seat cover"])} {i}',
+             category=rng.choice(['brakes', 'engine', 'interior', 'lighting']), price=Decimal(rng.randint(5, 900)),
+             stock=rng.randint(0, 500), description='Synthetic benchmark part')
+        for i in range(volumes['parts'])
+    ])
+    Part.compatible_cars.through.objects.bulk_create([
+        Part.compatible_cars.through(part_id=part.pk, car_id=car.pk)
+        for part in parts for car in rng.sample(cars, min(3, len(cars)))
+    ], batch_size=batch_size)
+    refresh_compatible_cars_counts([part.pk for part in parts])
+
+    bulk(TestDrive, [
+        TestDrive(user=rng.choice(users), car=rng.choice(cars), date=(now + datetime.timedelta(days=rng.randint(1, 60))).date(),
+                  time=datetime.time(rng.randint(9, 17)), status=rng.choice(['pending', 'confirmed', 'completed']))
+        for _ in range(volumes['test_drives'])
+    ])
+    bulk(LoanApplication, [
+        LoanApplication(user=rng.choice(users), car=rng.choice(cars), amount=Decimal(rng.randint(1000, 50000)),
+                        duration_months=rng.choice([12, 24, 36, 60]), monthly_income=Decimal(rng.randint(1000, 9000)),
+                        employment_status='Employed', status=rng.choice(['pending', 'approved', 'rejected']))
+        for _ in range(volumes['loans'])
+    ])
+    sold = rng.sample(cars, min(volumes['car_purchases'], len(cars)))
+    bulk(CarPurchase, [
+        CarPurchase(user=rng.choice(users), car=car, total_price=car.price, payment_method='card',
+                    status=rng.choice(['pending', 'paid', 'confirmed']))
+        for car in sold
+    ])
+    Car.objects.filter(pk__in=[car.pk for car in sold]).update(status='reserved', updated_at=now)
+    orders = bulk(PartOrder, [
+        PartOrder(user=rng.choice(users), total_amount=Decimal('0'), payment_method='cash',
+                  shipping_address='1 Benchmark Road', status=rng.choice(['pending', 'paid', 'shipped']))
+        for _ in range(volumes['part_orders'])
+    ])
+    bulk(PartOrderItem, [
+        PartOrderItem(order=order, part=part, quantity=rng.randint(1, 3), price=part.price)
+        for order in orders for part in rng.sample(parts, min(rng.randint(1, 3), len(parts)))
+    ])
+    bulk(CompanyRequest, [
+        CompanyRequest(company_name=f'Bench Applicant {i}', country='Benchland', contact_email=f'apply{i}@bench.example',
+                       requested_username=f'{BENCH_PREFIX}applicant_{i}', requested_password=BENCH_PASSWORD)
+        for i in range(volumes['company_requests'])
+    ])
+
+    cart = Cart.objects.create(user=buyer)
+    bulk(CartItem, [CartItem(cart=cart, part=part, quantity=1) for part in parts[:3]])
+
+    rebuild_index()
+    rebuild_company_stats(companies)
+    volumes['accounts'] = [admin.username, owner.username, buyer.username]
+    return volumes
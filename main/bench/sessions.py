@@ -0,0 +1,67 @@
+import random
+import time
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.test import Client, override_settings
+
+from ..models import CartItem, Company, Part
+from .base import client_settings, counting_queries, scenario, throwaway_data
+
+SESSION_CASES = {
+    **{tier: {'SESSION_ENGINE': engine} for tier, engine in settings.SESSION_TIERS.items()},
+    # What skipping unchanged writes saves once every request saves the session
+    'db_save_every_request_stock': {'SESSION_ENGINE': 'django.contrib.sessions.backends.db',
+                                    'SESSION_SAVE_EVERY_REQUEST': True},
+    'db_save_every_request': {'SESSION_ENGINE': settings.SESSION_TIERS['db'], 'SESSION_SAVE_EVERY_REQUEST': True},
+}
+
+
+def _session_query(sql):
+    if 'django_session' in sql:
+        return 'reads' if sql.lstrip().upper().startswith('SELECT') else 'writes'
+    return None
+
+
+@scenario('sessions')
+def bench_sessions(actions=1000, **options):
+    """Session table reads and writes per 1,000 cart actions of a logged-in
+    user (add, +1, -1 and remove, each followed to the page it redirects
+    to, as a browser would) for every session tier.
+    """
+    results = {'actions': actions}
+    with throwaway_data(), client_settings():
+        company = Company.objects.create(name='Bench Sessions', country='Benchland')
+        part = Part.objects.create(company=company, company_name=company.name, name='Bench part',
+                                   category='Bench', price=Decimal('10.00'), stock=10 ** 6, description='Bench')
+        user = User.objects.create_user(f'bench_sessions_{random.randrange(10 ** 9)}', password='bench')
+
+        def cart_action(client, i):
+            step = i % 4
+            if step == 0:
+                client.get(f'/cart/add/{part.pk}/', follow=True)
+                return
+            item = CartItem.objects.get(cart__user=user, part=part)
+            if step == 3:
+                client.get(f'/cart/remove/{item.pk}/', follow=True)
+            else:
+                client.post(f'/cart/update/{item.pk}/', {'action': 'increase' if step == 1 else 'decrease'},
+                            follow=True)
+
+        for name, overrides in SESSION_CASES.items():
+            with override_settings(**overrides):
+                client = Client()
+                client.force_login(user)
+                start = time.perf_counter()
+                with counting_queries(_session_query) as counts:
+                    for i in range(actions):
+                        cart_action(client, i)
+                elapsed = (time.perf_counter() - start) * 1000
+                client.logout()
+            results[name] = {
+                'session_reads_per_1000': round(counts['reads'] * 1000 / actions, 1),
+                'session_writes_per_1000': round(counts['writes'] * 1000 / actions, 1),
+                'ms_per_action': round(elapsed / actions, 3),
+            }
+    return results
@@ -0,0 +1,29 @@
+from .. import views
+from ..models import Car
+from ..pagination import encode_cursor, keyset_paginate
+from .base import make_cars, scenario, summarize, throwaway_data, timed
+
+
+@scenario('sort')
+def bench_sort(rows=10000, iterations=50, **options):
+    """The car_list page halfway through the catalog in every sort order:
+    the keyset seek the view runs vs the OFFSET query it replaces.
+    """
+    page_size = views.CAR_PAGE_SIZE
+    results = {'rows': rows}
+    with throwaway_data():
+        make_cars(rows)
+        available = Car.objects.filter(status='available')
+        offset = rows // 2
+        for sort, (_, ordering) in views.CAR_SORTS.items():
+            ordered = available.order_by(*ordering)
+            # The cursor a reader paging from the start would hold there
+            last = ordered[offset - 1]
+            cursor = encode_cursor([getattr(last, field.lstrip('-')) for field in ordering])
+            results[sort] = {
+                'offset': summarize([timed(lambda: list(ordered[offset:offset + page_size + 1]))
+                                     for _ in range(iterations)]),
+                'keyset': summarize([timed(keyset_paginate, available, ordering, page_size, after=cursor)
+                                     for _ in range(iterations)]),
+            }
+    return results
@@ -0,0 +1,98 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import CommandError
+from django.test import Client
+from django.urls import URLPattern, get_resolver
+
+from ..models import Car, CarPurchase, CartItem, Company, CompanyRequest, LoanApplication, Part, TestDrive
+from .base import client_settings, counting_queries, ms_since, scenario, summarize
+from .seed import BENCH_PREFIX
+
+# GET views that change data are not driven by the harness
+SKIP_URLS = {'logout', 'add_to_cart', 'remove_from_cart', 'company_car_delete',
+             'company_part_delete', 'admin_company_delete'}
+PUBLIC_URLS = {'home', 'register', 'company_register_request', 'login', 'car_list', 'car_detail', 'part_list'}
+
+
+def _url_role(name):
+    if name in PUBLIC_URLS:
+        return 'anonymous'
+    if name.startswith('admin_'):
+        return 'admin'
+    if name.startswith('company_'):
+        return 'company'
+    return 'user'
+
+
+def _url_arguments():
+    owner = Company.objects.get(user__username=f'{BENCH_PREFIX}company')
+    buyer = User.objects.get(username=f'{BENCH_PREFIX}user')
+    car = Car.objects.filter(company=owner).first() or Car.objects.first()
+    first = lambda queryset: queryset.values_list('pk', flat=True).first()
+    return {
+        'car_detail': first(Car.objects.filter(status='available')),
+        'buy_car': first(Car.objects.filter(status='available')),
+        'schedule_test_drive': car.pk,
+        'apply_loan': car.pk,
+        'edit_loan': first(LoanApplication.objects.filter(user=buyer)),
+        'update_cart_quantity': first(CartItem.objects.filter(cart__user=buyer)),
+        'company_car_edit': first(Car.objects.filter(company=owner)),
+        'company_part_edit': first(Part.objects.filter(company=owner)),
+        'company_test_drive_update': first(TestDrive.objects.filter(car__company=owner)),
+        'company_loan_update': first(LoanApplication.objects.filter(car__company=owner)),
+        'company_update_purchase': first(CarPurchase.objects.filter(car__company=owner)),
+        'admin_company_edit': owner.pk,
+        'admin_approve_company': first(CompanyRequest.objects.all()),
+        'admin_user_detail': buyer.pk,
+    }
+
+
+@scenario('urls')
+def bench_urls(iterations=50, **options):
+    """Drive every GET-safe URL in main.urls through the test client."""
+    if not User.objects.filter(username=f'{BENCH_PREFIX}admin').exists():
+        raise CommandError('No benchmark data found; run `manage.py seed_bench` first.')
+
+    clients = {'anonymous': Client(raise_request_exception=False)}
+    for role in ('admin', 'company', 'user'):
+        clients[role] = Client(raise_request_exception=False)
+        clients[role].force_login(User.objects.get(username=f'{BENCH_PREFIX}{role}'))
+    arguments = _url_arguments()
+
+    results = {}
+    with client_settings():
+        for pattern in get_resolver('main.urls').url_patterns:
+            if not isinstance(pattern, URLPattern) or pattern.name in SKIP_URLS:
+                continue
+            name = pattern.name
+            converters = list(pattern.pattern.converters)
+            if converters and arguments.get(name) is None:
+                results[f'main:{name}'] = {'skipped': 'no matching seed row'}
+                continue
+            path = '/' + str(pattern.pattern)
+            for converter in converters:
+                path = path.replace(f'<int:{converter}>', str(arguments[name]))
+
+            client = clients[_url_role(name)]
+            queries, samples, statuses = [], [], {}
+            for i in range(iterations + 1):
+                start = time.perf_counter()
+                with counting_queries() as counts:
+                    response = client.get(path)
+                elapsed = ms_since(start)
+                if i == 0:
+                    continue  # warm-up
+                samples.append(elapsed)
+                queries.append(counts['queries'])
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+            results[f'main:{name}'] = {
+                'path': path,
+                'role': _url_role(name),
+                'status_codes': statuses,
+                'requests_per_sec': round(len(samples) / (sum(samples) / 1000), 1),
+                'latency_ms': summarize(samples),
+                'queries': {'mean': round(sum(queries) / len(queries), 2), 'max': max(queries)},
+            }
+    return results
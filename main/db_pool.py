@@ -0,0 +1,72 @@
+import threading
+import weakref
+
+from django.conf import settings
+from django.db import connections
+
+# Django keeps one connection per thread and alias; with CONN_MAX_AGE > 0
+# those connections outlive the request and together act as this worker's
+# pool. This module counts them and closes the surplus above
+# DB_MAX_CONNECTIONS_PER_WORKER when a request finishes.
+
+_lock = threading.Lock()
+_wrappers = weakref.WeakSet()
+_counters = {'opened': 0, 'reused': 0, 'closed_over_limit': 0}
+
+
+def _bump(name):
+    with _lock:
+        _counters[name] += 1
+
+
+def _open_wrappers():
+    with _lock:
+        wrappers = list(_wrappers)
+    return [wrapper for wrapper in wrappers if wrapper.connection is not None]
+
+
+def connection_opened(wrapper):
+    with _lock:
+        _wrappers.add(wrapper)
+        _counters['opened'] += 1
+
+
+def request_started():
+    # Runs after Django's close_old_connections(), so whatever is still
+    # open here will serve this request without a new handshake
+    for wrapper in connections.all(initialized_only=True):
+        if wrapper.connection is not None:
+            _bump('reused')
+
+
+def request_finished():
+    limit = settings.DB_MAX_CONNECTIONS_PER_WORKER
+    if not limit:
+        return
+    for wrapper in connections.all(initialized_only=True):
+        if (wrapper.connection is not None and not wrapper.in_atomic_block
+                and len(_open_wrappers()) > limit):
+            wrapper.close()
+            _bump('closed_over_limit')
+
+
+def snapshot():
+    open_wrappers = _open_wrappers()
+    by_alias = {}
+    for wrapper in open_wrappers:
+        by_alias[wrapper.alias] = by_alias.get(wrapper.alias, 0) + 1
+    with _lock:
+        counters = dict(_counters)
+    return {
+        'open': len(open_wrappers),
+        'open_by_alias': by_alias,
+        'limit': settings.DB_MAX_CONNECTIONS_PER_WORKER,
+        'conn_max_age': {alias: connections.settings[alias].get('CONN_MAX_AGE', 0) for alias in connections},
+        **counters,
+    }
+
+
+def reset():
+    with _lock:
+        for name in _counters:
+            _counters[name] = 0
@@ -0,0 +1,144 @@
+import csv
+import datetime
+import json
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import router
+from django.http import HttpResponseBadRequest, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from .models import CarPurchase, PartOrder
+from .pagination import keyset_chunks
+
+EXPORT_CHUNK_SIZE = 2000
+FORMATS = {'csv': 'text/csv', 'jsonl': 'application/x-ndjson'}
+
+# Streaming report exports of the admin listings, oldest first. Columns are
+# (header, field lookup) pairs read with values_list(), so no model instances
+# are built; rows are fetched EXPORT_CHUNK_SIZE at a time.
+EXPORTS = {
+    'car_purchases': {
+        'model': CarPurchase,
+        'date_field': 'purchase_date',
+        'columns': [
+            ('id', 'id'),
+            ('purchase_date', 'purchase_date'),
+            ('status', 'status'),
+            ('customer', 'user__username'),
+            ('customer_email', 'user__email'),
+            ('company', 'car__company_name'),
+            ('car', 'car__model'),
+            ('car_year', 'car__year'),
+            ('total_price', 'total_price'),
+            ('payment_method', 'payment_method'),
+            ('payment_date', 'payment_date'),
+            ('transaction_id', 'transaction_id'),
+        ],
+    },
+    'part_orders': {
+        'model': PartOrder,
+        'date_field': 'order_date',
+        'columns': [
+            ('id', 'id'),
+            ('order_date', 'order_date'),
+            ('status', 'status'),
+            ('customer', 'user__username'),
+            ('customer_email', 'user__email'),
+            ('total_amount', 'total_amount'),
+            ('payment_method', 'payment_method'),
+            ('payment_date', 'payment_date'),
+            ('transaction_id', 'transaction_id'),
+            ('shipping_address', 'shipping_address'),
+        ],
+    },
+}
+
+
+class ExportError(ValueError):
+    pass
+
+
+def _start_of_day(value):
+    try:
+        day = parse_date(value)
+    except ValueError:
+        day = None
+    if day is None:
+        raise ExportError(f'Invalid date {value!r}, expected YYYY-MM-DD')
+    return timezone.make_aware(datetime.datetime.combine(day, datetime.time.min))
+
+
+def export_queryset(name, params):
+    """Rows of export `name` filtered by the from/to (inclusive dates) and
+    status parameters; raises ExportError on bad values.
+    """
+    export = EXPORTS[name]
+    model, date_field = export['model'], export['date_field']
+    queryset = model.objects.all()
+
+    status = params.get('status')
+    if status:
+        if status not in dict(model.STATUS_CHOICES):
+            raise ExportError(f'Unknown status {status!r}')
+        queryset = queryset.filter(status=status)
+    if params.get('from'):
+        queryset = queryset.filter(**{f'{date_field}__gte': _start_of_day(params['from'])})
+    if params.get('to'):
+        end = _start_of_day(params['to']) + datetime.timedelta(days=1)
+        queryset = queryset.filter(**{f'{date_field}__lt': end})
+    return queryset.values_list(*[field for _, field in export['columns']], named=True)
+
+
+class _Echo:
+    # csv.writer target that hands each line back instead of buffering it
+    def write(self, value):
+        return value
+
+
+def _csv_cell(value):
+    return value.isoformat() if isinstance(value, datetime.datetime) else value
+
+
+def _renderers(fmt, headers):
+    # (header line, row -> line)
+    if fmt == 'csv':
+        writer = csv.writer(_Echo())
+        return writer.writerow(headers), lambda row: writer.writerow([_csv_cell(value) for value in row])
+    return '', lambda row: json.dumps(dict(zip(headers, row)), cls=DjangoJSONEncoder) + '\n'
+
+
+def _lines(chunks, header, render):
+    yield header
+    for chunk in chunks:
+        yield ''.join(render(row) for row in chunk)
+
+
+async def _alines(chunks, header, render):
+    # ASGI would consume a sync iterator into memory before sending it
+    yield header
+    while (chunk := await sync_to_async(next)(chunks, None)) is not None:
+        yield ''.join(render(row) for row in chunk)
+
+
+def export_response(request, name):
+    fmt = request.GET.get('format', 'csv')
+    if fmt not in FORMATS:
+        return HttpResponseBadRequest(f'Unknown format {fmt!r}, expected one of: {", ".join(FORMATS)}')
+    try:
+        queryset = export_queryset(name, request.GET)
+    except ExportError as error:
+        return HttpResponseBadRequest(str(error))
+
+    # The body streams after the middleware has returned, so pick the
+    # database (possibly a replica) while the request's routing applies
+    queryset = queryset.using(router.db_for_read(queryset.model))
+    chunks = keyset_chunks(queryset, [EXPORTS[name]['date_field'], 'id'], EXPORT_CHUNK_SIZE)
+    header, render = _renderers(fmt, [header for header, _ in EXPORTS[name]['columns']])
+    lines = _alines if isinstance(request, ASGIRequest) else _lines
+
+    response = StreamingHttpResponse(lines(chunks, header, render), content_type=FORMATS[fmt])
+    response['Content-Disposition'] = f'attachment; filename="{name}-{timezone.localdate():%Y%m%d}.{fmt}"'
+    return response
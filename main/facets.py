@@ -0,0 +1,219 @@
+import hashlib
+import json
+from collections import Counter
+from datetime import timedelta
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from . import jobs
+from .models import Car, FacetCounts
+
+# Faceted filtering of the public car catalog. Every facet is counted with
+# the selections of all the *other* facets applied, so picking "diesel" still
+# shows how many petrol cars there are. All counts come from one grouped
+# query of conditional aggregates (see count_facets). The unfiltered
+# catalog, which most visits see, reads a precomputed FacetCounts row
+# instead, refreshed in the background once it is CAR_FACETS_MAX_AGE seconds
+# old; filtered counts are cached for CAR_FACETS_CACHE_SECONDS.
+RANGE_FACETS = {
+    # Buckets run from one bound up to (not including) the next; a selected
+    # bucket becomes an inclusive min/max filter, hence the step. `limit` is
+    # the largest value the column holds; bigger ones make the database raise
+    'year': {'label': 'Year', 'bounds': [2005, 2010, 2015, 2020], 'step': 1, 'cast': int, 'limit': 2 ** 31 - 1},
+    'price': {'label': 'Price', 'bounds': [5000, 10000, 20000, 40000], 'step': Decimal('0.01'), 'cast': Decimal,
+              'limit': Decimal('99999999.99')},
+    'mileage': {'label': 'Mileage (km)', 'bounds': [20000, 50000, 100000, 150000], 'step': 1, 'cast': int,
+                'limit': 2 ** 31 - 1},
+}
+MAX_ID = 2 ** 63 - 1  # Largest BigAutoField key, for company ids
+VALUE_FACETS = {'fuel_type': 'fuel_type', 'color': 'color', 'company': 'company_id'}
+TOP_VALUES = 12
+SNAPSHOT_NAME = 'cars'
+REFRESH_LOCK_KEY = 'main:car_facets_refresh'
+
+
+def _number(value, facet):
+    try:
+        number = facet['cast'](value) if value not in (None, '') else None
+    except (ValueError, InvalidOperation):
+        return None
+    # Decimal() also parses "NaN" and "Infinity"
+    if number is None or not Decimal(number).is_finite() or abs(number) > facet['limit']:
+        return None
+    return number
+
+
+def _buckets(facet):
+    bounds = [None] + facet['bounds'] + [None]
+    return list(zip(bounds, bounds[1:]))
+
+
+def _bucket_q(name, low, high):
+    q = Q(**{f'{name}__gte': low}) if low is not None else Q()
+    return q & Q(**{f'{name}__lt': high}) if high is not None else q
+
+
+def parse_filters(params):
+    """Facet selections from the query string; unparseable values are ignored."""
+    filters = {}
+    for name in ('fuel_type', 'color'):
+        values = sorted({value for value in params.getlist(name) if value})
+        if values:
+            filters[name] = values
+    companies = sorted({int(value) for value in params.getlist('company')
+                        if value.isdigit() and int(value) <= MAX_ID})
+    if companies:
+        filters['company'] = companies
+    for name, facet in RANGE_FACETS.items():
+        low = _number(params.get(f'{name}_min'), facet)
+        high = _number(params.get(f'{name}_max'), facet)
+        if low is not None or high is not None:
+            filters[name] = (low, high)
+    return filters
+
+
+def filter_q(filters, skip=None):
+    """The selections as a Q, leaving out facet `skip`."""
+    q = Q()
+    for name, value in filters.items():
+        if name == skip:
+            continue
+        if name in RANGE_FACETS:
+            low, high = value
+            if low is not None:
+                q &= Q(**{f'{name}__gte': low})
+            if high is not None:
+                q &= Q(**{f'{name}__lte': high})
+        else:
+            q &= Q(**{f'{VALUE_FACETS[name]}__in': value})
+    return q
+
+
+def count_facets(cars, filters):
+    """Raw, JSON-serialisable facet counts of `cars` under `filters`.
+
+    One scan: rows are grouped by color and company, each group carries a
+    conditional count per fuel type and range bucket, and the groups are
+    summed up here.
+    """
+    aggregates = {
+        'n_total': Count('pk', filter=filter_q(filters) or None),
+        'n_color': Count('pk', filter=filter_q(filters, 'color') or None),
+        'n_company': Count('pk', filter=filter_q(filters, 'company') or None),
+    }
+    for value, _ in Car.FUEL_CHOICES:
+        aggregates[f'fuel_type_{value}'] = Count('pk', filter=filter_q(filters, 'fuel_type') & Q(fuel_type=value))
+    for name, facet in RANGE_FACETS.items():
+        for i, (low, high) in enumerate(_buckets(facet)):
+            aggregates[f'{name}_{i}'] = Count('pk', filter=filter_q(filters, name) & _bucket_q(name, low, high))
+    groups = cars.order_by().values('color', 'company_id', 'company_name').annotate(**aggregates)
+
+    totals, colors, companies = Counter(), Counter(), {}
+    for group in groups:
+        totals.update({key: value for key, value in group.items() if key in aggregates})
+        colors[group['color']] += group['n_color']
+        company = companies.setdefault(group['company_id'], [group['company_id'], group['company_name'], 0])
+        company[2] += group['n_company']
+
+    counts = {
+        'total': totals['n_total'],
+        'fuel_type': [[value, totals[f'fuel_type_{value}']] for value, _ in Car.FUEL_CHOICES],
+        'color': [[color, count] for color, count in colors.items() if count],
+        'company': [company for company in companies.values() if company[2]],
+    }
+    for name, facet in RANGE_FACETS.items():
+        counts[name] = [totals[f'{name}_{i}'] for i in range(len(facet['bounds']) + 1)]
+    return counts
+
+
+def refresh_snapshot():
+    counts = count_facets(Car.objects.filter(status='available'), {})
+    FacetCounts.objects.update_or_create(name=SNAPSHOT_NAME,
+                                         defaults={'counts': counts, 'refreshed_at': timezone.now()})
+
+
+def request_refresh():
+    # One queued refresh per CAR_FACETS_MAX_AGE, however many requests notice,
+    # and none while one is still waiting for a worker
+    if cache.add(REFRESH_LOCK_KEY, True, settings.CAR_FACETS_MAX_AGE):
+        jobs.enqueue_once('car_facets')
+
+
+def car_facet_counts(cars, filters, search_query):
+    """Facet counts for the catalog page: the snapshot when nothing is
+    selected, otherwise counted live and cached briefly.
+    """
+    if not filters and not search_query:
+        snapshot = FacetCounts.objects.filter(name=SNAPSHOT_NAME).first()
+        if snapshot is None or snapshot.refreshed_at < timezone.now() - timedelta(seconds=settings.CAR_FACETS_MAX_AGE):
+            request_refresh()
+        if snapshot is not None:
+            return snapshot.counts
+
+    selection = json.dumps([search_query, filters], sort_keys=True, default=str)
+    key = 'main:car_facets:' + hashlib.md5(selection.encode()).hexdigest()
+    counts = cache.get(key)
+    if counts is None:
+        counts = count_facets(cars, filters)
+        cache.set(key, counts, settings.CAR_FACETS_CACHE_SECONDS)
+    return counts
+
+
+def _query(params, **changes):
+    params = params.copy()
+    for key in ('after', 'before'):
+        params.pop(key, None)
+    for key, value in changes.items():
+        if value is None:
+            params.pop(key, None)
+        else:
+            params[key] = str(value)
+    return params.urlencode()
+
+
+def _top(options):
+    # The biggest values, plus any selected one that did not make the cut
+    options.sort(key=lambda option: (-option['count'], str(option['label']).lower()))
+    return [option for i, option in enumerate(options) if i < TOP_VALUES or option['selected']]
+
+
+def present_facets(counts, filters, params):
+    """Facets as the catalog template lists them."""
+    fuel_labels = dict(Car.FUEL_CHOICES)
+    facets = [{
+        'name': 'fuel_type', 'label': 'Fuel',
+        'options': [{'value': value, 'label': fuel_labels[value], 'count': count,
+                     'selected': value in filters.get('fuel_type', [])} for value, count in counts['fuel_type']],
+    }, {
+        'name': 'color', 'label': 'Color',
+        'options': _top([{'value': value, 'label': value, 'count': count,
+                          'selected': value in filters.get('color', [])} for value, count in counts['color']]),
+    }, {
+        'name': 'company', 'label': 'Company',
+        'options': _top([{'value': pk, 'label': name, 'count': count,
+                          'selected': pk in filters.get('company', [])} for pk, name, count in counts['company']]),
+    }]
+    for name, facet in RANGE_FACETS.items():
+        selected_low, selected_high = filters.get(name, (None, None))
+        options = []
+        for (low, high), count in zip(_buckets(facet), counts[name]):
+            high_inclusive = high - facet['step'] if high is not None else None
+            if low is None:
+                label = f'Under {high:,}'
+            elif high is None:
+                label = f'{low:,}+'
+            else:
+                label = f'{low:,} – {high_inclusive:,}'
+            selected = (selected_low, selected_high) == (low, high_inclusive)
+            options.append({
+                'label': label, 'count': count, 'selected': selected,
+                'query': _query(params, **{f'{name}_min': None if selected else low,
+                                           f'{name}_max': None if selected else high_inclusive}),
+            })
+        facets.append({'name': name, 'label': facet['label'], 'range': True, 'options': options,
+                       'min': selected_low, 'max': selected_high})
+    return facets
@@ -1,5 +1,8 @@
+import os
+
 from django import forms
-from .models import Company, Car, Part, TestDrive, LoanApplication, CompanyRequest
+from .imports import openpyxl
+from .models import Company, Car, Part, TestDrive, LoanApplication, CompanyRequest, ImportJob
 
 class CompanyForm(forms.ModelForm):
     class Meta:
@@ -13,9 +16,11 @@ class CompanyForm(forms.ModelForm):
         }
 
 class CarForm(forms.ModelForm):
+    # No status: reserving and selling go through main.services, whose
+    # conditional updates a stale edit form must not write over
     class Meta:
         model = Car
-        fields = ['model', 'year', 'price', 'color', 'fuel_type', 'mileage', 'description', 'image', 'status']
+        fields = ['model', 'year', 'price', 'color', 'fuel_type', 'mileage', 'description', 'image']
         widgets = {
             'model': forms.TextInput(attrs={'class': 'form-control'}),
             'year': forms.NumberInput(attrs={'class': 'form-control'}),
@@ -24,7 +29,6 @@ class CarForm(forms.ModelForm):
             'fuel_type': forms.Select(attrs={'class': 'form-control'}),
             'mileage': forms.NumberInput(attrs={'class': 'form-control'}),
             'description': forms.Textarea(attrs={'class': 'form-control', 'rows': 4}),
-            'status': forms.Select(attrs={'class': 'form-control'}),
         }
 
 class PartForm(forms.ModelForm):
@@ -76,4 +80,23 @@ class CompanyRequestForm(forms.ModelForm):
             'contact_phone': forms.TextInput(attrs={'class': 'form-control', 'placeholder': '+1 234 567 8900'}),
             'requested_username': forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Choose a username'}),
             'requested_password': forms.PasswordInput(attrs={'class': 'form-control', 'placeholder': 'Choose a password'}),
-        }
\ No newline at end of file
+        }
+
+
+class ImportJobForm(forms.ModelForm):
+    class Meta:
+        model = ImportJob
+        fields = ['kind', 'file']
+        widgets = {
+            'kind': forms.Select(attrs={'class': 'form-control'}),
+            'file': forms.ClearableFileInput(attrs={'class': 'form-control', 'accept': '.csv,.xlsx'}),
+        }
+
+    def clean_file(self):
+        upload = self.cleaned_data['file']
+        extension = os.path.splitext(upload.name)[1].lower()
+        if extension not in ('.csv', '.xlsx'):
+            raise forms.ValidationError('Upload a .csv or .xlsx file.')
+        if extension == '.xlsx' and openpyxl is None:
+            raise forms.ValidationError('XLSX imports are not available on this server; upload a CSV file.')
+        return upload
@@ -0,0 +1,65 @@
+import os
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage, default_storage
+from PIL import Image, ImageOps, features
+
+# Resized copies of uploaded images, stored next to the original as
+# <upload dir>/variants/<variant>/<name>.<ext>, so grids don't ship the
+# full-size upload.
+VARIANTS = {
+    'thumbnail': (160, 120),
+    'card': (480, 360),
+    'detail': (1200, 900),
+}
+FORMATS = {'jpg': 'JPEG'}
+if features.check('webp'):
+    FORMATS['webp'] = 'WEBP'
+
+# Variants are derived from already content-addressed originals, so they are
+# written under their exact names rather than through default_storage.
+variant_storage = FileSystemStorage()
+
+
+def variant_name(name, variant, ext):
+    directory, filename = os.path.split(name)
+    stem = os.path.splitext(filename)[0]
+    return f'{directory}/variants/{variant}/{stem}.{ext}'
+
+
+def has_variants(name, storage=variant_storage):
+    return storage.exists(variant_name(name, 'thumbnail', 'jpg'))
+
+
+def generate_variants(name, storage=variant_storage):
+    with default_storage.open(name) as f:
+        image = ImageOps.exif_transpose(Image.open(f))
+        image.load()
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+
+    for variant, size in VARIANTS.items():
+        if variant != 'thumbnail' and image.width <= size[0] and image.height <= size[1]:
+            continue  # Already small enough; templates fall back to the original
+        # The thumbnail is written even for tiny originals (thumbnail() never
+        # enlarges), since has_variants() looks for it
+        resized = image.copy()
+        resized.thumbnail(size, Image.LANCZOS)
+        for ext, fmt in FORMATS.items():
+            out = resized.convert('RGB') if fmt == 'JPEG' else resized
+            buffer = BytesIO()
+            out.save(buffer, fmt, quality=82, optimize=True)
+            target = variant_name(name, variant, ext)
+            if storage.exists(target):
+                storage.delete(target)
+            storage.save(target, ContentFile(buffer.getvalue()))
+
+
+def delete_variants(name, storage=variant_storage):
+    for variant in VARIANTS:
+        for ext in FORMATS:
+            target = variant_name(name, variant, ext)
+            if storage.exists(target):
+                storage.delete(target)
+
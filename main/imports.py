@@ -0,0 +1,233 @@
+import csv
+import io
+import logging
+
+from django.db import transaction
+from django.forms import modelform_factory
+from django.utils import timezone
+
+from . import search
+from .models import Car, Part
+from .page_cache import home_page
+from .stats import bump_company_stats, refresh_compatible_cars_counts
+
+try:
+    import openpyxl
+except ImportError:  # XLSX uploads are optional
+    openpyxl = None
+
+logger = logging.getLogger(__name__)
+
+# Bulk import of a company's cars or parts from CSV/XLSX. Every row is
+# validated with the same model fields as the add forms, matched by sku to
+# the company's existing items, and written IMPORT_BATCH_SIZE rows at a
+# time with bulk_create()/bulk_update(). Parts may list the SKUs of
+# compatible cars in a `compatible_cars` column, separated by semicolons.
+IMPORT_BATCH_SIZE = 500
+MAX_REPORTED_ERRORS = 1000
+
+# No car status: like CarForm, an import must not write over a reservation
+# (main.services); new cars start out available
+IMPORT_FORMS = {
+    'car': modelform_factory(Car, fields=['model', 'year', 'price', 'color', 'fuel_type', 'mileage',
+                                          'description']),
+    'part': modelform_factory(Part, fields=['name', 'category', 'price', 'stock', 'description']),
+}
+DEFAULTS = {'car': {}, 'part': {}}
+MODELS = {'car': Car, 'part': Part}
+STATS_COUNTERS = {'car': 'total_cars', 'part': 'total_parts'}
+SKU_MAX_LENGTH = 64
+
+
+class ImportFailed(Exception):
+    pass
+
+
+def _cell(value):
+    # XLSX cells arrive typed (2020.0 for a year); the forms expect text
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+def _csv_rows(f):
+    return csv.reader(io.TextIOWrapper(f, encoding='utf-8-sig', newline=''))
+
+
+def _xlsx_rows(f):
+    if openpyxl is None:
+        raise ImportFailed('XLSX imports need the openpyxl package; upload a CSV file instead.')
+    workbook = openpyxl.load_workbook(f, read_only=True, data_only=True)
+    try:
+        yield from workbook.active.iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+
+def open_rows(f, name):
+    """Return the lower-cased column names of a CSV or XLSX file and an
+    iterator of (row number, {column: text}) for its non-empty rows.
+    """
+    rows = iter(_xlsx_rows(f) if name.lower().endswith('.xlsx') else _csv_rows(f))
+    columns = [_cell(value).lower() for value in next(rows, [])]
+
+    def data_rows():
+        for number, values in enumerate(rows, start=2):
+            values = [_cell(value) for value in values]
+            if any(values):
+                yield number, dict(zip(columns, values))
+
+    return columns, data_rows()
+
+
+def import_columns(kind):
+    """(required, optional) column names for imports of `kind`."""
+    required, optional = ['sku'], []
+    for name, field in IMPORT_FORMS[kind].base_fields.items():
+        (required if field.required and name not in DEFAULTS[kind] else optional).append(name)
+    if kind == 'part':
+        optional.append('compatible_cars')
+    return required, optional
+
+
+class Importer:
+    def __init__(self, job, columns):
+        self.job = job
+        self.company = job.company
+        self.model = MODELS[job.kind]
+        self.form_class = IMPORT_FORMS[job.kind]
+        self.fields = list(self.form_class.base_fields) + ['company_name']
+        self.defaults = DEFAULTS[job.kind]
+        self.links = job.kind == 'part' and 'compatible_cars' in columns
+        self.first_row = {}  # sku -> row it was first seen on
+        self.batch = []  # (row number, unsaved object, compatible car SKUs)
+
+    def error(self, number, errors):
+        self.job.error_count += 1
+        if len(self.job.errors) < MAX_REPORTED_ERRORS:
+            self.job.errors.append({'row': number, 'errors': errors})
+
+    def add(self, number, row):
+        self.job.total_rows += 1
+        sku = row.get('sku', '')
+        if not sku or len(sku) > SKU_MAX_LENGTH:
+            return self.error(number, {'sku': [f'Required, at most {SKU_MAX_LENGTH} characters.']})
+        if sku in self.first_row:
+            return self.error(number, {'sku': [f'Duplicate of row {self.first_row[sku]}.']})
+        self.first_row[sku] = number
+
+        form = self.form_class({**self.defaults, **{name: value for name, value in row.items() if value}})
+        if not form.is_valid():
+            return self.error(number, {field: list(messages) for field, messages in form.errors.items()})
+        obj = form.save(commit=False)
+        obj.company, obj.company_name, obj.sku = self.company, self.company.name, sku
+        cars = {value.strip() for value in row.get('compatible_cars', '').split(';') if value.strip()}
+        self.batch.append((number, obj, cars))
+        if len(self.batch) >= IMPORT_BATCH_SIZE:
+            self.flush()
+
+    def _resolve_cars(self, batch):
+        wanted = {sku for _, _, cars in batch for sku in cars}
+        car_ids = dict(Car.objects.filter(company=self.company, sku__in=wanted).values_list('sku', 'pk'))
+        kept = []
+        for number, obj, cars in batch:
+            unknown = sorted(cars - car_ids.keys())
+            if unknown:
+                self.error(number, {'compatible_cars': [f'Unknown car SKU: {", ".join(unknown)}']})
+            else:
+                kept.append((number, obj, [car_ids[sku] for sku in cars]))
+        return kept
+
+    def flush(self):
+        batch, self.batch = self.batch, []
+        if self.links:
+            batch = self._resolve_cars(batch)
+        if not batch:
+            return self.save_progress()
+
+        objects = [obj for _, obj, _ in batch]
+        with transaction.atomic():
+            existing = {row['sku']: row for row in self.model.objects.filter(
+                company=self.company, sku__in=[obj.sku for obj in objects]).values('pk', 'sku', *self.fields)}
+            created = [obj for obj in objects if obj.sku not in existing]
+            updated, unchanged, changed_fields = [], [], set()
+            now = timezone.now()
+            for obj in objects:
+                if obj.sku in existing:
+                    row = existing[obj.sku]
+                    obj.pk = row['pk']
+                    # bulk_update() costs a CASE per row and field, and
+                    # re-uploads mostly repeat rows, so send only what changed
+                    changes = {name for name in self.fields if row[name] != getattr(obj, name)}
+                    if changes:
+                        obj.updated_at = now
+                        updated.append(obj)
+                        changed_fields |= changes
+                    else:
+                        unchanged.append(obj)
+
+            self.model.objects.bulk_create(created)
+            if created and created[0].pk is None:
+                # MySQL does not return the new ids from a bulk insert
+                ids = dict(self.model.objects.filter(company=self.company, sku__in=[obj.sku for obj in created])
+                           .values_list('sku', 'pk'))
+                for obj in created:
+                    obj.pk = ids[obj.sku]
+            if updated:
+                self.model.objects.bulk_update(updated, sorted(changed_fields) + ['updated_at'], batch_size=100)
+
+            if self.links:
+                Link = Part.compatible_cars.through
+                part_ids = [obj.pk for obj in objects]
+                Link.objects.filter(part_id__in=part_ids).delete()
+                Link.objects.bulk_create([Link(part_id=obj.pk, car_id=car_id)
+                                          for _, obj, car_ids in batch for car_id in car_ids])
+                refresh_compatible_cars_counts(part_ids)
+
+            # bulk_create() and bulk_update() send no signals
+            changed = created + updated
+            if self.model is Car:
+                search.index_cars(changed)
+                home_page.invalidate()
+            else:
+                search.index_parts(changed)
+            bump_company_stats(self.company.pk, **{STATS_COUNTERS[self.job.kind]: len(created)})
+
+        self.job.created_count += len(created)
+        self.job.updated_count += len(updated)
+        self.job.unchanged_count += len(unchanged)
+        self.save_progress()
+
+    def save_progress(self):
+        self.job.save(update_fields=['total_rows', 'created_count', 'updated_count', 'unchanged_count',
+                                     'error_count', 'errors'])
+
+
+def run_import(job):
+    job.status = 'processing'
+    job.save(update_fields=['status'])
+    try:
+        with job.file.storage.open(job.file.name, 'rb') as f:
+            columns, rows = open_rows(f, job.file.name)
+            missing = [name for name in import_columns(job.kind)[0] if name not in columns]
+            if missing:
+                raise ImportFailed(f'Missing columns: {", ".join(missing)}')
+            importer = Importer(job, columns)
+            for number, row in rows:
+                importer.add(number, row)
+            importer.flush()
+    except ImportFailed as error:
+        job.status, job.message = 'failed', str(error)
+    except (UnicodeDecodeError, csv.Error) as error:
+        job.status, job.message = 'failed', f'Not a UTF-8 CSV file: {error}'
+    except Exception as error:
+        logger.exception('Import job %s failed', job.pk)
+        job.status, job.message = 'failed', f'Could not read the file: {error}'
+    else:
+        job.status = 'done'
+    job.finished_at = timezone.now()
+    job.save()
+    return job
+
@@ -0,0 +1,154 @@
+import logging
+import os
+import socket
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, transaction
+from django.db.models import Count, F, Min
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+# A database-backed job queue. Views and signals enqueue() slow side effects
+# as Job rows in their own transaction, so a job exists exactly when the
+# change that needs it was committed; `manage.py run_workers` processes claim
+# and run them. Tasks are functions registered with @task (see main.tasks)
+# that take JSON-serialisable keyword arguments. A failed attempt is retried
+# after JOB_RETRY_DELAY seconds, doubled each time, so tasks must be safe to
+# run again; a task raises JobFailed when retrying cannot help.
+TASKS = {}
+MAINTENANCE_INTERVAL = 60
+
+
+class JobFailed(Exception):
+    pass
+
+
+def task(name, max_attempts=3):
+    def register(func):
+        TASKS[name] = (func, max_attempts)
+        return func
+    return register
+
+
+def enqueue(task_name, /, **kwargs):
+    return enqueue_at(timezone.now(), task_name, **kwargs)
+
+
+def enqueue_at(run_at, task_name, /, **kwargs):
+    _, max_attempts = TASKS[task_name]
+    return Job.objects.create(task=task_name, kwargs=kwargs, max_attempts=max_attempts, run_at=run_at)
+
+
+def enqueue_once(task_name, /, **kwargs):
+    """enqueue() unless the same job is already queued or running; returns
+    the new Job or None.
+    """
+    if Job.objects.filter(task=task_name, kwargs=kwargs, status__in=['queued', 'running']).exists():
+        return None
+    return enqueue(task_name, **kwargs)
+
+
+def worker_name():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def claim(worker):
+    """Mark the next due job as running on `worker` and return it, or None."""
+    now = timezone.now()
+    with transaction.atomic():
+        pk = (Job.objects.select_for_update(skip_locked=True)
+              .filter(status='queued', run_at__lte=now).order_by('run_at', 'id')
+              .values_list('pk', flat=True).first())
+        if pk is None:
+            return None
+        # Without row locks (SQLite) two workers can pick the same row;
+        # only one of them gets to flip its status
+        claimed = Job.objects.filter(pk=pk, status='queued').update(
+            status='running', locked_by=worker, locked_at=now, attempts=F('attempts') + 1)
+    return Job.objects.get(pk=pk) if claimed else None
+
+
+def run_job(job):
+    func, _ = TASKS.get(job.task, (None, None))
+    try:
+        if func is None:
+            raise LookupError(f'Unknown task {job.task!r}')
+        func(**job.kwargs)
+    except Exception as e:
+        logger.exception('Job %s (%s) failed on attempt %s of %s', job.pk, job.task, job.attempts, job.max_attempts)
+        job.last_error = traceback.format_exc()
+        if job.attempts < job.max_attempts and not isinstance(e, JobFailed):
+            job.status = 'queued'
+            job.run_at = timezone.now() + timedelta(seconds=settings.JOB_RETRY_DELAY * 2 ** (job.attempts - 1))
+        else:
+            job.status, job.finished_at = 'failed', timezone.now()
+    else:
+        job.status, job.finished_at = 'done', timezone.now()
+    job.locked_by, job.locked_at = '', None
+    job.save(update_fields=['status', 'run_at', 'finished_at', 'last_error', 'locked_by', 'locked_at'])
+    return job
+
+
+def recover_stale():
+    """Requeue jobs whose worker died mid-run, or fail them when out of attempts."""
+    stale = Job.objects.filter(status='running', locked_at__lt=timezone.now() - timedelta(seconds=settings.JOB_TIMEOUT))
+    stale.filter(attempts__gte=F('max_attempts')).update(
+        status='failed', locked_by='', locked_at=None, finished_at=timezone.now(), last_error='Worker timed out')
+    return stale.update(status='queued', locked_by='', locked_at=None)
+
+
+def prune():
+    cutoff = timezone.now() - timedelta(days=settings.JOB_RETENTION_DAYS)
+    return Job.objects.filter(status='done', finished_at__lt=cutoff).delete()[0]
+
+
+def work(burst=False, stop=lambda: False):
+    """Run jobs until stop() is true, or, with `burst`, until none are due.
+    Returns the number of jobs run.
+    """
+    worker = worker_name()
+    ran, next_maintenance = 0, 0
+    while not stop():
+        close_old_connections()
+        try:
+            if time.monotonic() >= next_maintenance:
+                recover_stale()
+                prune()
+                next_maintenance = time.monotonic() + MAINTENANCE_INTERVAL
+            job = claim(worker)
+        except DatabaseError:
+            # Keep the process up while the database restarts or fails over
+            logger.exception('Could not claim a job')
+            time.sleep(settings.JOB_POLL_INTERVAL)
+            continue
+        if job is None:
+            if burst:
+                break
+            time.sleep(settings.JOB_POLL_INTERVAL)
+            continue
+        run_job(job)
+        ran += 1
+    return ran
+
+
+def snapshot(failures=20):
+    """Job counts per task and status, how long the oldest due job has
+    waited, and the latest failures.
+    """
+    counts = {}
+    for row in Job.objects.values('task', 'status').annotate(total=Count('pk')).order_by():
+        counts.setdefault(row['task'], {})[row['status']] = row['total']
+    now = timezone.now()
+    oldest = Job.objects.filter(status='queued', run_at__lte=now).aggregate(oldest=Min('run_at'))['oldest']
+    return {
+        'counts': counts,
+        'queue_lag_seconds': round((now - oldest).total_seconds(), 1) if oldest else 0,
+        'failed': list(Job.objects.filter(status='failed').order_by('-finished_at')
+                       .values('id', 'task', 'kwargs', 'attempts', 'finished_at', 'last_error')[:failures]),
+    }
@@ -0,0 +1,42 @@
+import json
+import platform
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import override_settings
+from django.utils import timezone
+
+from main.bench import SCENARIOS
+
+
+class Command(BaseCommand):
+    help = 'Run a benchmark scenario and print its results as JSON.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('scenario', help=f'One of: {", ".join(sorted(SCENARIOS))}')
+        parser.add_argument('--rows', type=int, default=10000, help='Synthetic rows to generate')
+        parser.add_argument('--iterations', type=int, default=50, help='Timed iterations per case')
+        parser.add_argument('--concurrency', type=int, default=8, help='Worker threads for concurrent scenarios')
+        parser.add_argument('--output', help='Also save the results to this JSON file')
+
+    def handle(self, *args, **options):
+        func = SCENARIOS.get(options['scenario'])
+        if func is None:
+            raise CommandError(f"Unknown scenario '{options['scenario']}'. Choose from: {', '.join(sorted(SCENARIOS))}")
+        started_at = timezone.now().isoformat()
+        # Benchmark traffic must not end up in the site's request profiles
+        with override_settings(QUERY_PROFILING=False):
+            results = func(**options)
+        report = {
+            'scenario': options['scenario'],
+            'started_at': started_at,
+            'database': connection.vendor,
+            'python': platform.python_version(),
+            'options': {key: options[key] for key in ('rows', 'iterations', 'concurrency')},
+            'results': results,
+        }
+        output = json.dumps(report, indent=2, default=str)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output)
+        self.stdout.write(output)
@@ -0,0 +1,36 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from main.images import generate_variants, has_variants
+from main.models import Car, Company, Part
+
+
+class Command(BaseCommand):
+    help = 'Generate thumbnail/card/detail variants for existing car, part and company images.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Rebuild variants that already exist')
+        parser.add_argument('--workers', type=int, default=settings.IMAGE_VARIANT_WORKERS)
+
+    def handle(self, *args, **options):
+        names = set()
+        for model, field in ((Car, 'image'), (Part, 'image'), (Company, 'logo')):
+            names.update(model.objects.exclude(**{field: ''}).exclude(**{f'{field}__isnull': True})
+                         .values_list(field, flat=True))
+        if not options['force']:
+            names = {name for name in names if not has_variants(name)}
+
+        def build(name):
+            try:
+                generate_variants(name)
+                return None
+            except Exception as e:
+                return f'{name}: {e}'
+
+        with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+            errors = [error for error in pool.map(build, sorted(names)) if error]
+        for error in errors:
+            self.stderr.write(error)
+        self.stdout.write(self.style.SUCCESS(f'Built variants for {len(names) - len(errors)} of {len(names)} images.'))
@@ -0,0 +1,61 @@
+import hashlib
+import os
+import posixpath
+
+from django.apps import apps
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from main.images import generate_variants, has_variants
+from main.storage import MEDIA_FIELDS, release
+
+
+class Command(BaseCommand):
+    help = ('Move uploads saved before content-addressed storage to their hashed names, '
+            'point the rows at them and delete the copies nothing refers to any more.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        renamed = {}
+        for model_label, field in MEDIA_FIELDS:
+            model = apps.get_model(model_label)
+            names = (model.objects.exclude(**{field: ''}).exclude(**{f'{field}__isnull': True})
+                     .values_list(field, flat=True).distinct())
+            for name in names:
+                if name not in renamed:
+                    renamed[name] = self.hashed_name(name, write=not options['dry_run'])
+                new_name = renamed[name]
+                if new_name and new_name != name and not options['dry_run']:
+                    changes = {field: new_name}
+                    if any(f.name == 'updated_at' for f in model._meta.concrete_fields):
+                        changes['updated_at'] = timezone.now()  # Expire cached cards
+                    model.objects.filter(**{field: name}).update(**changes)
+
+        moved = {old: new for old, new in renamed.items() if new and new != old}
+        for old, new in sorted(moved.items()):
+            self.stdout.write(f'{old} -> {new}')
+        if not options['dry_run']:
+            for old, new in moved.items():
+                release(old)
+                if not has_variants(new):
+                    generate_variants(new)
+        missing = [old for old, new in renamed.items() if new is None]
+        for name in missing:
+            self.stderr.write(f'missing file: {name}')
+        self.stdout.write(self.style.SUCCESS(f'{len(moved)} file(s) moved to content-addressed names.'))
+
+    def hashed_name(self, name, write=True):
+        if not default_storage.exists(name):
+            return None
+        digest = hashlib.sha256()
+        with default_storage.open(name) as f:
+            for chunk in f.chunks():
+                digest.update(chunk)
+        hashed = posixpath.join(posixpath.dirname(name), digest.hexdigest() + os.path.splitext(name)[1].lower())
+        if write and hashed != name and not default_storage.exists(hashed):
+            with default_storage.open(name) as f:
+                default_storage.save(hashed, f)
+        return hashed
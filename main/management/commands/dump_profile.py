@@ -0,0 +1,31 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from main.profiling import load_dumps, summarize
+
+
+class Command(BaseCommand):
+    help = 'Merge the per-process request profiles and print them as JSON, slowest views first.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', help='Write the JSON to this file instead of stdout')
+        parser.add_argument('--sort', default='total_ms', help='Metric to rank views by (p95)')
+        parser.add_argument('--max-age', type=int, default=settings.PROFILING_MAX_AGE,
+                            help='Ignore and delete profiles not written for this many seconds')
+
+    def handle(self, *args, **options):
+        merged = load_dumps(options['max_age'])
+        if not merged:
+            raise CommandError(f'No recent profiles found in {settings.PROFILING_DUMP_DIR}')
+
+        summary = summarize(merged)
+        metric = options['sort']
+        ranked = dict(sorted(summary.items(), key=lambda item: item[1].get(metric, {}).get('p95', 0), reverse=True))
+        output = json.dumps(ranked, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output)
+        else:
+            self.stdout.write(output)
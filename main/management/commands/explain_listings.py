@@ -0,0 +1,99 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from main.models import (Car, CarPurchase, CompanyRequest, LoanApplication, Part, PartOrder,
+                         PartOrderItem, TestDrive)
+from main.views import CAR_DETAIL_PARTS, CAR_PAGE_SIZE, CAR_SORTS, PART_PAGE_SIZE, PART_SORTS
+
+
+def listing_queries():
+    # The query shapes behind the listing views; ids are placeholders, the
+    # plan does not depend on whether the rows exist.
+    queries = {
+        'car_list (company)': Car.objects.filter(status='available', company_id=1).order_by('-created_at', '-id')[:13],
+        'company_car_list': Car.objects.filter(company_id=1),
+        'car_detail parts': Part.objects.filter(company_id=1).order_by('-created_at', '-id')[:CAR_DETAIL_PARTS],
+        'my_test_drives': TestDrive.objects.filter(user_id=1).order_by('-created_at'),
+        'my_loans': LoanApplication.objects.filter(user_id=1).order_by('-created_at'),
+        'my_purchases': CarPurchase.objects.filter(user_id=1).order_by('-purchase_date'),
+        'my_part_orders': PartOrder.objects.filter(user_id=1).order_by('-order_date'),
+        'company_test_drive_list': TestDrive.objects.filter(car__company_id=1).order_by('-created_at'),
+        'company_loan_list': LoanApplication.objects.filter(car__company_id=1).order_by('-created_at'),
+        'company_car_purchases': CarPurchase.objects.filter(car__company_id=1).order_by('-purchase_date'),
+        'company_part_orders': PartOrderItem.objects.filter(part__company_id=1).order_by('-order__order_date'),
+        'admin_company_requests': CompanyRequest.objects.order_by('-created_at'),
+        'admin_all_purchases': CarPurchase.objects.order_by('-purchase_date'),
+        'admin_all_part_orders': PartOrder.objects.order_by('-order_date'),
+        'pending test drives': TestDrive.objects.filter(status='pending'),
+        'pending loans': LoanApplication.objects.filter(status='pending'),
+        'pending company requests': CompanyRequest.objects.filter(status='pending').order_by('-created_at'),
+        'expired reservations': Car.objects.filter(status='reserved', reserved_until__lt=timezone.now()),
+    }
+    for sort, (_, ordering) in CAR_SORTS.items():
+        queries[f'car_list ({sort})'] = Car.objects.filter(status='available').order_by(*ordering)[:CAR_PAGE_SIZE + 1]
+    for sort, (_, ordering) in PART_SORTS.items():
+        queries[f'part_list ({sort})'] = Part.objects.order_by(*ordering)[:PART_PAGE_SIZE + 1]
+    return queries
+
+
+def _mysql_full_scans(plan):
+    scans = []
+
+    def walk(node):
+        if isinstance(node, dict):
+            if node.get('access_type') == 'ALL':
+                scans.append(node.get('table_name'))
+            for value in node.values():
+                walk(value)
+        elif isinstance(node, list):
+            for value in node:
+                walk(value)
+
+    walk(json.loads(plan))
+    return scans
+
+
+def _sqlite_full_scans(plan):
+    # "SCAN main_car" reads the whole table; "SCAN t USING INDEX" walks an
+    # index in order and "SEARCH" seeks into one.
+    scans = []
+    for line in plan.splitlines():
+        words = line.split()
+        if 'SCAN' in words and 'INDEX' not in words:
+            scans.append(words[words.index('SCAN') + 1])
+    return scans
+
+
+def full_table_scans(queryset):
+    """Tables the plan of `queryset` reads in full."""
+    if connection.vendor == 'mysql':
+        return _mysql_full_scans(queryset.explain(format='json'))
+    if connection.vendor == 'sqlite':
+        return _sqlite_full_scans(queryset.explain())
+    raise NotImplementedError(f'No EXPLAIN parser for {connection.vendor}')
+
+
+class Command(BaseCommand):
+    help = ('EXPLAIN every listing query and exit with an error if any of them falls back '
+            'to a full table scan. Run it against seeded data (manage.py seed_bench): '
+            'on near-empty tables MySQL may rightly prefer a scan.')
+
+    def handle(self, *args, **options):
+        if connection.vendor not in ('mysql', 'sqlite'):
+            raise CommandError(f'No EXPLAIN parser for {connection.vendor}')
+
+        failures = []
+        for name, queryset in listing_queries().items():
+            scans = full_table_scans(queryset)
+            if scans:
+                failures.append(name)
+                self.stdout.write(self.style.ERROR(f'FULL SCAN  {name}: {", ".join(scans)}'))
+            else:
+                self.stdout.write(f'ok         {name}')
+
+        if failures:
+            raise CommandError(f'{len(failures)} listing queries fall back to a full table scan.')
+        self.stdout.write(self.style.SUCCESS('All listing queries use an index.'))
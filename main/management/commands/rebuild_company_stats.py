@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from main.models import Company
+from main.stats import rebuild_company_stats
+
+
+class Command(BaseCommand):
+    help = 'Recompute the company dashboard counters from scratch.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        ids = list(Company.objects.order_by('pk').values_list('pk', flat=True))
+        size = options['batch_size']
+        for start in range(0, len(ids), size):
+            rebuild_company_stats(Company.objects.filter(pk__in=ids[start:start + size]))
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt stats for {len(ids)} companies.'))
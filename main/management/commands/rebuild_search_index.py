@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from main.models import SearchToken
+from main.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the car and part search index from scratch.'
+
+    def handle(self, *args, **options):
+        rebuild_index()
+        self.stdout.write(self.style.SUCCESS(f'Indexed {SearchToken.objects.count()} search tokens.'))
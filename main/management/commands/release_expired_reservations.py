@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from main.services import expire_reservations
+
+
+class Command(BaseCommand):
+    help = 'Put cars back on sale whose unpaid reservation has lapsed (run from cron).'
+
+    def handle(self, *args, **options):
+        count = expire_reservations()
+        self.stdout.write(self.style.SUCCESS(f'Released {count} expired reservation(s).'))
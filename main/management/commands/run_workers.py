@@ -0,0 +1,65 @@
+import multiprocessing
+import signal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from main.jobs import work
+
+
+def _serve(burst):
+    # Finish the current job, then exit, on SIGTERM/SIGINT
+    stopping = []
+    signal.signal(signal.SIGTERM, lambda signum, frame: stopping.append(signum))
+    signal.signal(signal.SIGINT, lambda signum, frame: stopping.append(signum))
+    return work(burst=burst, stop=lambda: bool(stopping))
+
+
+class Command(BaseCommand):
+    help = 'Run background jobs from the database queue (main.jobs) in a pool of worker processes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=settings.JOB_WORKERS)
+        parser.add_argument('--burst', action='store_true', help='Exit once no job is due instead of polling')
+
+    def handle(self, *args, **options):
+        processes, burst = options['processes'], options['burst']
+        if processes <= 1:
+            ran = _serve(burst)
+            self.stdout.write(self.style.SUCCESS(f'Ran {ran} job(s).'))
+            return
+
+        # Children must not share the parent's database connections
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+        stopping = []
+
+        def start():
+            process = context.Process(target=_serve, args=(burst,), daemon=True)
+            process.start()
+            return process
+
+        def stop(signum, frame):
+            stopping.append(signum)
+            for process in pool:
+                if process.is_alive():
+                    process.terminate()  # SIGTERM: they finish their current job
+
+        pool = [start() for _ in range(processes)]
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+        self.stdout.write(f'Started {processes} worker processes.')
+
+        while pool:
+            for i, process in enumerate(pool):
+                process.join(timeout=1)
+                if process.is_alive():
+                    continue
+                if process.exitcode != 0 and not stopping:
+                    self.stderr.write(f'Worker {process.pid} exited with {process.exitcode}, restarting it.')
+                    pool[i] = start()
+                else:
+                    pool[i] = None
+            pool = [process for process in pool if process is not None]
+        self.stdout.write(self.style.SUCCESS('All workers stopped.'))
@@ -0,0 +1,24 @@
+import json
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from main.bench import flush_bench_data, seed_bench_data
+
+
+class Command(BaseCommand):
+    help = 'Bulk-insert synthetic companies, cars, parts, users and orders for benchmarking.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=float, default=1,
+                            help='Multiplier on the base volumes (1 = 1,000 cars, 500 parts, 200 users, ...)')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed, for reproducible data')
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--keep', action='store_true', help='Keep earlier benchmark data instead of replacing it')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            if not options['keep']:
+                flush_bench_data()
+            created = seed_bench_data(options['scale'], options['seed'], options['batch_size'])
+        self.stdout.write(json.dumps(created, indent=2))
@@ -0,0 +1,134 @@
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.urls import Resolver404, resolve
+
+from . import profiling
+from .query_budget import async_execute_wrapper, execute_wrapper
+from .routers import current_routing, new_routing
+
+
+class QueryProfilingMiddleware:
+    """Record query count, duplicate queries, DB time, template time and
+    total time of every request, keyed by URL name (e.g. main:car_list).
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def _measure(self, sample):
+        seen = set()
+
+        def measure(execute, sql, params, many, context):
+            key = (sql, repr(params))
+            sample['queries'] += 1
+            if key in seen:
+                sample['duplicate_queries'] += 1
+            seen.add(key)
+            start = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                sample['db_ms'] += (time.perf_counter() - start) * 1000
+
+        return measure
+
+    def _record(self, request, sample, start):
+        sample['total_ms'] = (time.perf_counter() - start) * 1000
+        match = request.resolver_match
+        if match is not None:
+            profiling.record(match.view_name, sample)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not settings.QUERY_PROFILING:
+            return self.get_response(request)
+
+        sample = profiling.new_sample()
+        token = profiling.current_sample.set(sample)
+        start = time.perf_counter()
+        try:
+            with execute_wrapper(self._measure(sample)):
+                response = self.get_response(request)
+        finally:
+            profiling.current_sample.reset(token)
+        self._record(request, sample, start)
+        return response
+
+    async def __acall__(self, request):
+        if not settings.QUERY_PROFILING:
+            return await self.get_response(request)
+
+        sample = profiling.new_sample()
+        token = profiling.current_sample.set(sample)
+        start = time.perf_counter()
+        try:
+            async with async_execute_wrapper(self._measure(sample)):
+                response = await self.get_response(request)
+        finally:
+            profiling.current_sample.reset(token)
+        self._record(request, sample, start)
+        return response
+
+
+class ReplicaRoutingMiddleware:
+    """Let main.routers.ReplicaRouter serve reads from a replica for GET
+    requests to REPLICA_READ_VIEWS. A request that writes sets a cookie
+    that keeps the browser on the primary for REPLICA_STICKY_SECONDS, so
+    users see their own changes despite replication lag.
+    """
+    sync_capable = True
+    async_capable = True
+    cookie_name = 'primary_sticky'
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def _wants_replica(self, request):
+        if request.method not in ('GET', 'HEAD') or self.cookie_name in request.COOKIES:
+            return False
+        try:
+            match = resolve(request.path_info, getattr(request, 'urlconf', None))
+        except Resolver404:
+            return False
+        return match.view_name in settings.REPLICA_READ_VIEWS
+
+    def _finish(self, routing, response):
+        if routing['wrote']:
+            response.set_cookie(self.cookie_name, '1', max_age=settings.REPLICA_STICKY_SECONDS,
+                                httponly=True, samesite='Lax')
+        return response
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not settings.REPLICA_DATABASES:
+            return self.get_response(request)
+
+        routing = new_routing(self._wants_replica(request))
+        token = current_routing.set(routing)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_routing.reset(token)
+        return self._finish(routing, response)
+
+    async def __acall__(self, request):
+        if not settings.REPLICA_DATABASES:
+            return await self.get_response(request)
+
+        routing = new_routing(self._wants_replica(request))
+        token = current_routing.set(routing)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_routing.reset(token)
+        return self._finish(routing, response)
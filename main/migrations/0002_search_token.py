@@ -0,0 +1,53 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:27
+
+import re
+
+from django.db import migrations, models
+
+
+def build_index(apps, schema_editor):
+    Car = apps.get_model('main', 'Car')
+    Part = apps.get_model('main', 'Part')
+    SearchToken = apps.get_model('main', 'SearchToken')
+
+    def tokens(*texts):
+        return {t[:50] for t in re.findall(r'\w+', ' '.join(texts).lower())}
+
+    batch_size = 2000
+    rows = []
+
+    def add(kind, object_id, *texts):
+        rows.extend(SearchToken(kind=kind, object_id=object_id, token=t) for t in tokens(*texts))
+        if len(rows) >= batch_size:
+            SearchToken.objects.bulk_create(rows)
+            rows.clear()
+
+    # Plain tuples, a batch of tokens in memory at a time
+    for pk, model, color, company in Car.objects.values_list('pk', 'model', 'color', 'company__name').iterator(batch_size):
+        add('car', pk, model, color, company)
+    for pk, name, category, company in Part.objects.values_list('pk', 'name', 'category', 'company__name').iterator(batch_size):
+        add('part', pk, name, category, company)
+    SearchToken.objects.bulk_create(rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('car', 'Car'), ('part', 'Part')], max_length=10)),
+                ('object_id', models.BigIntegerField()),
+                ('token', models.CharField(max_length=50)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['kind', 'token', 'object_id'], name='main_search_kind_d93f66_idx'), models.Index(fields=['kind', 'object_id'], name='main_search_kind_0f9ee0_idx')],
+            },
+        ),
+        migrations.RunPython(build_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0002_search_token'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='car',
+            name='reserved_until',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
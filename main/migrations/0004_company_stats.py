@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0003_car_reserved_until'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CompanyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_cars', models.IntegerField(default=0)),
+                ('total_parts', models.IntegerField(default=0)),
+                ('pending_test_drives', models.IntegerField(default=0)),
+                ('pending_loans', models.IntegerField(default=0)),
+                ('car_purchases', models.IntegerField(default=0)),
+                ('part_orders', models.IntegerField(default=0)),
+                ('company', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='stats', to='main.company')),
+            ],
+            options={
+                'verbose_name_plural': 'Company stats',
+            },
+        ),
+    ]
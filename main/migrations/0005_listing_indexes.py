@@ -0,0 +1,79 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:33
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0004_company_stats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='car',
+            index=models.Index(fields=['status', 'created_at', 'id'], name='car_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='car',
+            index=models.Index(fields=['company', 'status', 'created_at', 'id'], name='car_company_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='car',
+            index=models.Index(fields=['status', 'reserved_until'], name='car_status_reserved_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='carpurchase',
+            index=models.Index(fields=['user', 'purchase_date'], name='carpurchase_user_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='carpurchase',
+            index=models.Index(fields=['car', 'status'], name='carpurchase_car_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='carpurchase',
+            index=models.Index(fields=['purchase_date'], name='carpurchase_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='companyrequest',
+            index=models.Index(fields=['status', 'created_at'], name='companyrequest_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='companyrequest',
+            index=models.Index(fields=['created_at'], name='companyrequest_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='loanapplication',
+            index=models.Index(fields=['user', 'created_at'], name='loan_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='loanapplication',
+            index=models.Index(fields=['car', 'status'], name='loan_car_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='loanapplication',
+            index=models.Index(fields=['status'], name='loan_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='partorder',
+            index=models.Index(fields=['user', 'order_date'], name='partorder_user_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='partorder',
+            index=models.Index(fields=['order_date'], name='partorder_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='testdrive',
+            index=models.Index(fields=['user', 'created_at'], name='testdrive_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='testdrive',
+            index=models.Index(fields=['car', 'created_at'], name='testdrive_car_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='testdrive',
+            index=models.Index(fields=['status'], name='testdrive_status_idx'),
+        ),
+    ]
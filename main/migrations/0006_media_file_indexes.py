@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0005_listing_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='car',
+            name='image',
+            field=models.ImageField(blank=True, db_index=True, null=True, upload_to='cars/'),
+        ),
+        migrations.AlterField(
+            model_name='company',
+            name='logo',
+            field=models.ImageField(blank=True, db_index=True, null=True, upload_to='companies/'),
+        ),
+        migrations.AlterField(
+            model_name='part',
+            name='image',
+            field=models.ImageField(blank=True, db_index=True, null=True, upload_to='parts/'),
+        ),
+    ]
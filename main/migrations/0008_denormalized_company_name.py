@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:05
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def copy_company_fields(apps, schema_editor):
+    Company = apps.get_model('main', 'Company')
+    Car = apps.get_model('main', 'Car')
+    Part = apps.get_model('main', 'Part')
+    Link = Part.compatible_cars.through
+
+    name = Company.objects.filter(pk=OuterRef('company_id')).values('name')[:1]
+    links = (Link.objects.filter(part_id=OuterRef('pk')).order_by()
+             .values('part_id').annotate(total=Count('pk')).values('total'))
+    Car.objects.update(company_name=Subquery(name))
+    Part.objects.update(company_name=Subquery(name),
+                        compatible_cars_count=Coalesce(Subquery(links, output_field=IntegerField()), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0007_car_part_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='car',
+            name='company_name',
+            field=models.CharField(default='', editable=False, max_length=100),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='part',
+            name='company_name',
+            field=models.CharField(default='', editable=False, max_length=100),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='part',
+            name='compatible_cars_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(copy_company_fields, migrations.RunPython.noop),
+    ]
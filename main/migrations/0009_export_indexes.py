@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:48
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0008_denormalized_company_name'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='carpurchase',
+            index=models.Index(fields=['status', 'purchase_date'], name='carpurchase_status_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='partorder',
+            index=models.Index(fields=['status', 'order_date'], name='partorder_status_date_idx'),
+        ),
+    ]
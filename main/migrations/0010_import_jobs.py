@@ -0,0 +1,59 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0009_export_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('car', 'Cars'), ('part', 'Parts')], max_length=10)),
+                ('file', models.FileField(upload_to='imports/')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('total_rows', models.IntegerField(default=0)),
+                ('created_count', models.IntegerField(default=0)),
+                ('updated_count', models.IntegerField(default=0)),
+                ('unchanged_count', models.IntegerField(default=0)),
+                ('error_count', models.IntegerField(default=0)),
+                ('errors', models.JSONField(blank=True, default=list)),
+                ('message', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='car',
+            name='sku',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name='part',
+            name='sku',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='car',
+            constraint=models.UniqueConstraint(fields=('company', 'sku'), name='car_company_sku_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='part',
+            constraint=models.UniqueConstraint(fields=('company', 'sku'), name='part_company_sku_uniq'),
+        ),
+        migrations.AddField(
+            model_name='importjob',
+            name='company',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='import_jobs', to='main.company'),
+        ),
+        migrations.AddIndex(
+            model_name='importjob',
+            index=models.Index(fields=['company', 'created_at'], name='importjob_company_created_idx'),
+        ),
+    ]
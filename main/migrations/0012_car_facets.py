@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0011_jobs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FacetCounts',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('counts', models.JSONField(default=dict)),
+                ('refreshed_at', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name_plural': 'Facet counts',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='car',
+            index=models.Index(fields=['status', 'fuel_type', 'created_at', 'id'], name='car_status_fuel_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='car',
+            index=models.Index(fields=['status', 'color', 'created_at', 'id'], name='car_status_color_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='car',
+            index=models.Index(fields=['status', 'fuel_type', 'year', 'price', 'mileage', 'color', 'company', 'company_name'], name='car_facets_covering_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0012_car_facets'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='car',
+            index=models.Index(fields=['status', 'price', 'id'], name='car_status_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='car',
+            index=models.Index(fields=['status', 'mileage', 'id'], name='car_status_mileage_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='car',
+            index=models.Index(fields=['status', 'year', 'id'], name='car_status_year_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='part',
+            index=models.Index(fields=['created_at', 'id'], name='part_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='part',
+            index=models.Index(fields=['price', 'id'], name='part_price_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:41
+
+import django.core.files.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0013_sort_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='importjob',
+            name='file',
+            field=models.FileField(storage=django.core.files.storage.FileSystemStorage(), upload_to='imports/'),
+        ),
+    ]
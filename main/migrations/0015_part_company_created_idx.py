@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-17 20:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0014_import_file_storage'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='part',
+            index=models.Index(fields=['company', 'created_at', 'id'], name='part_company_created_idx'),
+        ),
+    ]
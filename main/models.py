@@ -1,5 +1,13 @@
+from collections import namedtuple
+from decimal import Decimal
+
+from django.core.files.storage import FileSystemStorage
 from django.db import models
+from django.db.models import DecimalField, ExpressionWrapper, F, Sum, Window
 from django.contrib.auth.models import User
+from django.utils import timezone
+
+CartSummary = namedtuple('CartSummary', ['items', 'total'])
 
 class CompanyRequest(models.Model):
     STATUS_CHOICES = [
@@ -20,6 +28,12 @@ class CompanyRequest(models.Model):
     admin_notes = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='companyrequest_status_idx'),
+            models.Index(fields=['created_at'], name='companyrequest_created_idx'),
+        ]
+
     def __str__(self):
         return f"{self.company_name} - {self.get_status_display()}"
 
@@ -28,7 +42,7 @@ class Company(models.Model):
     name = models.CharField(max_length=100)
     country = models.CharField(max_length=100)
     description = models.TextField(blank=True)
-    logo = models.ImageField(upload_to='companies/', blank=True, null=True)
+    logo = models.ImageField(upload_to='companies/', blank=True, null=True, db_index=True)
     established_year = models.IntegerField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
@@ -38,6 +52,23 @@ class Company(models.Model):
     def __str__(self):
         return self.name
 
+# Denormalized counters for the company dashboard, kept current by the
+# signals in main/signals.py and rebuilt by `manage.py rebuild_company_stats`.
+class CompanyStats(models.Model):
+    company = models.OneToOneField(Company, on_delete=models.CASCADE, related_name='stats')
+    total_cars = models.IntegerField(default=0)
+    total_parts = models.IntegerField(default=0)
+    pending_test_drives = models.IntegerField(default=0)
+    pending_loans = models.IntegerField(default=0)
+    car_purchases = models.IntegerField(default=0)
+    part_orders = models.IntegerField(default=0)
+
+    class Meta:
+        verbose_name_plural = "Company stats"
+
+    def __str__(self):
+        return f"Stats - {self.company}"
+
 class Car(models.Model):
     FUEL_CHOICES = [
         ('petrol', 'Petrol'),
@@ -51,6 +82,8 @@ class Car(models.Model):
         ('reserved', 'Reserved'),
     ]
     company = models.ForeignKey(Company, on_delete=models.CASCADE)
+    company_name = models.CharField(max_length=100, editable=False)  # Copy of company.name for listings
+    sku = models.CharField(max_length=64, null=True, blank=True, editable=False)  # Dealer's key for bulk imports
     model = models.CharField(max_length=100)
     year = models.IntegerField()
     price = models.DecimalField(max_digits=10, decimal_places=2)
@@ -58,27 +91,167 @@ class Car(models.Model):
     fuel_type = models.CharField(max_length=20, choices=FUEL_CHOICES)
     mileage = models.IntegerField()
     description = models.TextField()
-    image = models.ImageField(upload_to='cars/', blank=True, null=True)
+    image = models.ImageField(upload_to='cars/', blank=True, null=True, db_index=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='available')
+    reserved_until = models.DateTimeField(null=True, blank=True)  # Unpaid reservations lapse after this
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)  # Versions the cached car card
+
+    class Meta:
+        indexes = [
+            # car_list: available cars, newest first, optionally per company
+            models.Index(fields=['status', 'created_at', 'id'], name='car_status_created_idx'),
+            models.Index(fields=['company', 'status', 'created_at', 'id'], name='car_company_status_idx'),
+            # release_expired_reservations
+            models.Index(fields=['status', 'reserved_until'], name='car_status_reserved_idx'),
+            # Catalog facets (main.facets): newest-first pages of one fuel
+            # type or color, and one index covering every column the facet
+            # counts read. Range filters are left to car_status_created_idx:
+            # an index on price can't also give created_at order.
+            models.Index(fields=['status', 'fuel_type', 'created_at', 'id'], name='car_status_fuel_created_idx'),
+            models.Index(fields=['status', 'color', 'created_at', 'id'], name='car_status_color_created_idx'),
+            models.Index(fields=['status', 'fuel_type', 'year', 'price', 'mileage', 'color', 'company',
+                                 'company_name'], name='car_facets_covering_idx'),
+            # car_list's other sort orders (views.CAR_SORTS), read either way
+            models.Index(fields=['status', 'price', 'id'], name='car_status_price_idx'),
+            models.Index(fields=['status', 'mileage', 'id'], name='car_status_mileage_idx'),
+            models.Index(fields=['status', 'year', 'id'], name='car_status_year_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['company', 'sku'], name='car_company_sku_uniq'),
+        ]
 
     def __str__(self):
-        return f"{self.company.name} {self.model} ({self.year})"
+        return f"{self.company_name} {self.model} ({self.year})"
 
 class Part(models.Model):
     company = models.ForeignKey(Company, on_delete=models.CASCADE)
+    company_name = models.CharField(max_length=100, editable=False)  # Copy of company.name for listings
+    sku = models.CharField(max_length=64, null=True, blank=True, editable=False)  # Dealer's key for bulk imports
     name = models.CharField(max_length=200)
     category = models.CharField(max_length=100)
     price = models.DecimalField(max_digits=10, decimal_places=2)
     stock = models.IntegerField()
     description = models.TextField()
-    image = models.ImageField(upload_to='parts/', blank=True, null=True)
+    image = models.ImageField(upload_to='parts/', blank=True, null=True, db_index=True)
     compatible_cars = models.ManyToManyField(Car, blank=True)
+    compatible_cars_count = models.PositiveIntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)  # Versions the cached part card
+
+    class Meta:
+        indexes = [
+            # part_list sort orders (views.PART_SORTS)
+            models.Index(fields=['created_at', 'id'], name='part_created_idx'),
+            models.Index(fields=['price', 'id'], name='part_price_idx'),
+            # The dealer's latest parts on car_detail (views.CAR_DETAIL_PARTS)
+            models.Index(fields=['company', 'created_at', 'id'], name='part_company_created_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['company', 'sku'], name='part_company_sku_uniq'),
+        ]
 
     def __str__(self):
         return self.name
 
+# A CSV/XLSX upload of a company's cars or parts, processed in the
+# background by main.imports.
+class ImportJob(models.Model):
+    KIND_CHOICES = [
+        ('car', 'Cars'),
+        ('part', 'Parts'),
+    ]
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('processing', 'Processing'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name='import_jobs')
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    # Not the content-addressed default storage: two identical uploads must
+    # not share a file that either job may delete
+    file = models.FileField(upload_to='imports/', storage=FileSystemStorage())
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    total_rows = models.IntegerField(default=0)
+    created_count = models.IntegerField(default=0)
+    updated_count = models.IntegerField(default=0)
+    unchanged_count = models.IntegerField(default=0)
+    error_count = models.IntegerField(default=0)
+    errors = models.JSONField(default=list, blank=True)  # [{'row': n, 'errors': {field: [...]}}], capped
+    message = models.TextField(blank=True)  # Why the whole import failed
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['company', 'created_at'], name='importjob_company_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.company.name} {self.kind} import #{self.pk} ({self.status})"
+
+# Precomputed facet counts of the unfiltered car catalog (main.facets),
+# refreshed by a background job.
+class FacetCounts(models.Model):
+    name = models.CharField(max_length=50, unique=True)
+    counts = models.JSONField(default=dict)
+    refreshed_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name_plural = "Facet counts"
+
+    def __str__(self):
+        return f"{self.name} facets ({self.refreshed_at:%Y-%m-%d %H:%M})"
+
+# A unit of background work for `manage.py run_workers`; see main.jobs.
+class Job(models.Model):
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+    task = models.CharField(max_length=100)
+    kwargs = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    run_at = models.DateTimeField(default=timezone.now)  # Not before; pushed back between retries
+    locked_by = models.CharField(max_length=100, blank=True)  # host:pid of the worker running it
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'run_at'], name='job_status_run_at_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.task} #{self.pk} ({self.status})"
+
+# Inverted index for catalog search: one row per word of a car's or part's
+# searchable text, kept in sync by the signals in main/signals.py.
+class SearchToken(models.Model):
+    KIND_CHOICES = [
+        ('car', 'Car'),
+        ('part', 'Part'),
+    ]
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField()
+    token = models.CharField(max_length=50)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['kind', 'token', 'object_id']),
+            models.Index(fields=['kind', 'object_id']),
+        ]
+
+    def __str__(self):
+        return f"{self.kind}:{self.object_id} {self.token}"
+
 class TestDrive(models.Model):
     STATUS_CHOICES = [
         ('pending', 'Pending'),
@@ -94,6 +267,13 @@ class TestDrive(models.Model):
     notes = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'created_at'], name='testdrive_user_created_idx'),
+            models.Index(fields=['car', 'created_at'], name='testdrive_car_created_idx'),
+            models.Index(fields=['status'], name='testdrive_status_idx'),
+        ]
+
     def __str__(self):
         return f"{self.user.username} - {self.car} on {self.date}"
 
@@ -115,6 +295,13 @@ class LoanApplication(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'created_at'], name='loan_user_created_idx'),
+            models.Index(fields=['car', 'status'], name='loan_car_status_idx'),
+            models.Index(fields=['status'], name='loan_status_idx'),
+        ]
+
     def __str__(self):
         return f"{self.user.username} - Loan for {self.car}"
 
@@ -122,8 +309,23 @@ class Cart(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    @staticmethod
+    def _line_total():
+        return ExpressionWrapper(F('quantity') * F('part__price'),
+                                 output_field=DecimalField(max_digits=12, decimal_places=2))
+
+    def get_summary(self):
+        # Items with their parts, each line's subtotal and the cart total
+        # (as a window over all lines) in a single query.
+        items = list(self.cartitem_set.select_related('part').annotate(
+            subtotal=self._line_total(),
+            cart_total=Window(Sum(self._line_total())),
+        ).order_by('pk'))
+        total = items[0].cart_total if items else Decimal('0')
+        return CartSummary(items, total)
+
     def get_total(self):
-        return sum(item.get_subtotal() for item in self.cartitem_set.all())
+        return self.cartitem_set.aggregate(total=Sum(self._line_total()))['total'] or Decimal('0')
 
     def __str__(self):
         return f"Cart - {self.user.username}"
@@ -161,6 +363,15 @@ class CarPurchase(models.Model):
     payment_date = models.DateTimeField(null=True, blank=True)
     transaction_id = models.CharField(max_length=100, blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'purchase_date'], name='carpurchase_user_date_idx'),
+            models.Index(fields=['car', 'status'], name='carpurchase_car_status_idx'),
+            models.Index(fields=['purchase_date'], name='carpurchase_date_idx'),
+            # Filtered exports (main.exports)
+            models.Index(fields=['status', 'purchase_date'], name='carpurchase_status_date_idx'),
+        ]
+
     def __str__(self):
         return f"{self.user.username} bought {self.car}"
 
@@ -187,6 +398,13 @@ class PartOrder(models.Model):
     payment_date = models.DateTimeField(null=True, blank=True)
     transaction_id = models.CharField(max_length=100, blank=True)
     shipping_address = models.TextField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'order_date'], name='partorder_user_date_idx'),
+            models.Index(fields=['order_date'], name='partorder_date_idx'),
+            models.Index(fields=['status', 'order_date'], name='partorder_status_date_idx'),
+        ]
     
     def __str__(self):
         return f"Order #{self.id} - {self.user.username}"
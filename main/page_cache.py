@@ -0,0 +1,111 @@
+import asyncio
+import math
+import random
+import time
+import uuid
+
+from django.conf import settings
+from django.contrib import messages
+from django.core.cache import cache
+from django.db import transaction
+
+# Whole-page cache for anonymous visitors. Two things keep an expiring entry
+# from sending every concurrent request to the database at once:
+#
+# * Probabilistic early refresh ("XFetch"): each hit rebuilds the page ahead
+#   of expiry with a probability that grows as expiry nears and with how
+#   long the page took to build, so one request usually refreshes it while
+#   everyone else is still served the current copy.
+# * A per-page lock: only its holder rebuilds. On a cold miss (first visit,
+#   eviction, invalidation) the others wait briefly for the holder's copy.
+#
+# invalidate() moves the page's generation on; an entry built from data read
+# before that is ignored, even if its build finishes afterwards.
+LOCK_SECONDS = 10
+MISS_WAIT_SECONDS = 0.05
+MISS_WAITS = 10
+
+
+def is_cacheable(request):
+    # len() of the message storage loads but does not consume the messages
+    return (request.method in ('GET', 'HEAD') and not request.GET
+            and not request.user.is_authenticated and not len(messages.get_messages(request)))
+
+
+class PageCache:
+    def __init__(self, name, timeout_setting):
+        self.timeout_setting = timeout_setting
+        self.page_key = f'main:page:{name}'
+        self.generation_key = f'main:page_generation:{name}'
+        self.lock_key = f'main:page_lock:{name}'
+        self.keys = [self.page_key, self.generation_key]
+
+    @property
+    def timeout(self):
+        return getattr(settings, self.timeout_setting)
+
+    def _read(self, values):
+        """(content, generation, stale) from a get_many() of self.keys."""
+        generation = values.get(self.generation_key)
+        entry = values.get(self.page_key)
+        if entry is None or entry['generation'] != generation:
+            return None, generation, True
+        # -log(U) is mostly around 1, occasionally much larger
+        early = entry['build_seconds'] * settings.PAGE_CACHE_EARLY_REFRESH * -math.log(1 - random.random())
+        return entry['content'], generation, time.time() + early >= entry['expires']
+
+    def _entry(self, content, generation, build_seconds):
+        return {'content': content, 'generation': generation, 'build_seconds': build_seconds,
+                'expires': time.time() + self.timeout}
+
+    def get(self, build):
+        """The cached page, or build() (returning bytes) when due for a rebuild."""
+        for _ in range(MISS_WAITS):
+            content, generation, stale = self._read(cache.get_many(self.keys))
+            if not stale:
+                return content
+            if cache.add(self.lock_key, True, LOCK_SECONDS):
+                try:
+                    start = time.perf_counter()
+                    content = build()
+                    cache.set(self.page_key, self._entry(content, generation, time.perf_counter() - start),
+                              self.timeout)
+                    return content
+                finally:
+                    cache.delete(self.lock_key)
+            if content is not None:
+                return content  # Someone else is refreshing it
+            time.sleep(MISS_WAIT_SECONDS)
+        # The lock holder is taking too long to keep this visitor waiting
+        return build()
+
+    async def aget(self, build):
+        """get() for async views; build is a coroutine function."""
+        for _ in range(MISS_WAITS):
+            content, generation, stale = self._read(await cache.aget_many(self.keys))
+            if not stale:
+                return content
+            if await cache.aadd(self.lock_key, True, LOCK_SECONDS):
+                try:
+                    start = time.perf_counter()
+                    content = await build()
+                    await cache.aset(self.page_key, self._entry(content, generation, time.perf_counter() - start),
+                                     self.timeout)
+                    return content
+                finally:
+                    await cache.adelete(self.lock_key)
+            if content is not None:
+                return content
+            await asyncio.sleep(MISS_WAIT_SECONDS)
+        return await build()
+
+    def invalidate(self):
+        # Only once committed: a rebuild before that would read the old rows
+        transaction.on_commit(self._expire)
+
+    def _expire(self):
+        cache.set(self.generation_key, uuid.uuid4().hex, None)
+        cache.delete(self.page_key)
+
+
+home_page = PageCache('home', 'HOME_PAGE_CACHE_SECONDS')
@@ -0,0 +1,160 @@
+import base64
+import binascii
+import datetime
+import decimal
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+# Keyset ("seek") pagination: instead of OFFSET, every page starts right after
+# the last row of the previous one, so page N costs the same as page 1.
+# The ordering must end with a unique column (the primary key) to be stable.
+
+
+class CursorEncoder(json.JSONEncoder):
+    # Unlike DjangoJSONEncoder this keeps full microsecond precision, which
+    # the seek comparison needs to land exactly on the last row of a page.
+    def default(self, o):
+        if isinstance(o, (datetime.datetime, datetime.date, datetime.time)):
+            return o.isoformat()
+        if isinstance(o, decimal.Decimal):
+            return str(o)
+        return super().default(o)
+
+
+def encode_cursor(values):
+    raw = json.dumps(values, cls=CursorEncoder, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token, length):
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        values = json.loads(raw)
+    except (binascii.Error, ValueError, TypeError):
+        return None
+    if not isinstance(values, list) or len(values) != length:
+        return None
+    return values
+
+
+def _seek_filter(ordering, values, forward):
+    # (a, b) after (x, y) means: a > x OR (a = x AND b > y), with the
+    # comparison flipped for descending fields and for backward seeks.
+    condition = Q()
+    for i, field in enumerate(ordering):
+        name = field.lstrip('-')
+        descending = field.startswith('-')
+        lookup = 'lt' if descending == forward else 'gt'
+        step = Q(**{f'{name}__{lookup}': values[i]})
+        for prev_field, prev_value in zip(ordering[:i], values[:i]):
+            step &= Q(**{prev_field.lstrip('-'): prev_value})
+        condition |= step
+    # Implied by the above, but unlike the OR it gives the database an index
+    # range to start from instead of scanning up to the cursor
+    first = ordering[0].lstrip('-')
+    lookup = 'lte' if ordering[0].startswith('-') == forward else 'gte'
+    return Q(**{f'{first}__{lookup}': values[0]}) & condition
+
+
+def _reverse(ordering):
+    return [field[1:] if field.startswith('-') else '-' + field for field in ordering]
+
+
+def _cursor_for(obj, ordering):
+    return encode_cursor([getattr(obj, field.lstrip('-')) for field in ordering])
+
+
+class KeysetPage:
+    def __init__(self, queryset, ordering, page_size, after=None, before=None):
+        self.ordering = list(ordering)
+        self.page_size = page_size
+        self.after = decode_cursor(after, len(self.ordering)) if after else None
+        self.before = decode_cursor(before, len(self.ordering)) if before and not self.after else None
+
+        try:
+            if self.before is not None:
+                queryset = queryset.filter(_seek_filter(self.ordering, self.before, forward=False))
+                queryset = queryset.order_by(*_reverse(self.ordering))
+            else:
+                if self.after is not None:
+                    queryset = queryset.filter(_seek_filter(self.ordering, self.after, forward=True))
+                queryset = queryset.order_by(*self.ordering)
+        except (ValidationError, ValueError, TypeError):
+            # Tampered cursor: start from the first page instead of a 500
+            self.after = self.before = None
+            queryset = queryset.order_by(*self.ordering)
+        # One extra row tells us whether another page exists without a COUNT(*)
+        self.queryset = queryset[:page_size + 1]
+        self.object_list = None
+
+    def finish(self, rows):
+        rows = list(rows)
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if self.before is not None:
+            rows.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, self.after is not None
+
+        self.object_list = rows
+        self.next_cursor = _cursor_for(rows[-1], self.ordering) if rows and has_next else None
+        self.previous_cursor = _cursor_for(rows[0], self.ordering) if rows and has_previous else None
+        return self
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+def keyset_paginate(queryset, ordering, page_size, after=None, before=None):
+    page = KeysetPage(queryset, ordering, page_size, after=after, before=before)
+    return page.finish(page.queryset)
+
+
+def keyset_chunks(queryset, ordering, chunk_size):
+    """Yield every row of queryset as lists of up to chunk_size rows, one
+    seek query per list. Unlike .iterator(), memory stays flat on MySQL,
+    whose driver buffers the whole result of a query client-side.
+    """
+    ordering = list(ordering)
+    names = [field.lstrip('-') for field in ordering]
+    queryset = queryset.order_by(*ordering)
+    last = None
+    while True:
+        chunk = queryset
+        if last is not None:
+            chunk = chunk.filter(_seek_filter(ordering, last, forward=True))
+        rows = list(chunk[:chunk_size])
+        if rows:
+            yield rows
+        if len(rows) < chunk_size:
+            return
+        last = [getattr(rows[-1], name) for name in names]
+
+
+def pick_sort(sorts, key):
+    """(key, ordering) of the requested sort; unknown keys get the first one.
+
+    `sorts` maps a ?sort= value to (label, ordering); every ordering should
+    have a composite index so deep pages stay index seeks.
+    """
+    if key not in sorts:
+        key = next(iter(sorts))
+    return key, sorts[key][1]
+
+
+def sort_choices(sorts, selected):
+    return [{'value': key, 'label': label, 'selected': key == selected} for key, (label, _) in sorts.items()]
+
+
+def page_querystring(request, *drop):
+    # Current filters minus the cursor params, so next/prev links keep them.
+    params = request.GET.copy()
+    for key in ('after', 'before') + drop:
+        params.pop(key, None)
+    return params.urlencode()
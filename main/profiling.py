@@ -0,0 +1,108 @@
+import glob
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextvars import ContextVar
+
+from django.conf import settings
+
+# Per-view rolling histograms of request cost, filled by
+# main.middleware.QueryProfilingMiddleware. Each process keeps its own
+# window and periodically writes it to PROFILING_DUMP_DIR so
+# `manage.py dump_profile` can merge all workers. Dumps not rewritten for
+# PROFILING_MAX_AGE seconds (mostly of processes that have exited) are
+# dropped when merging.
+
+METRICS = ['queries', 'duplicate_queries', 'db_ms', 'template_ms', 'total_ms']
+
+# The sample of the request being handled, for the template timing backend
+current_sample = ContextVar('current_sample', default=None)
+
+_lock = threading.Lock()
+_samples = defaultdict(lambda: deque(maxlen=settings.PROFILING_WINDOW))
+_recorded = 0
+
+
+def new_sample():
+    return {'queries': 0, 'duplicate_queries': 0, 'db_ms': 0.0, 'template_ms': 0.0, 'total_ms': 0.0}
+
+
+def record(view_name, sample):
+    global _recorded
+    with _lock:
+        _samples[view_name].append(sample)
+        _recorded += 1
+        flush = settings.PROFILING_DUMP_DIR and _recorded % settings.PROFILING_FLUSH_EVERY == 0
+    if flush:
+        dump()
+
+
+def raw_samples():
+    with _lock:
+        return {view_name: list(samples) for view_name, samples in _samples.items()}
+
+
+def _percentile(ordered, pct):
+    return ordered[min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))]
+
+
+def summarize(samples_by_view):
+    summary = {}
+    for view_name, samples in sorted(samples_by_view.items()):
+        if not samples:
+            continue
+        stats = {'requests': len(samples)}
+        for metric in METRICS:
+            ordered = sorted(sample[metric] for sample in samples)
+            stats[metric] = {
+                'mean': round(sum(ordered) / len(ordered), 3),
+                'p50': round(_percentile(ordered, 50), 3),
+                'p95': round(_percentile(ordered, 95), 3),
+                'p99': round(_percentile(ordered, 99), 3),
+                'max': round(ordered[-1], 3),
+            }
+        summary[view_name] = stats
+    return summary
+
+
+def snapshot():
+    return summarize(raw_samples())
+
+
+def dump():
+    os.makedirs(settings.PROFILING_DUMP_DIR, exist_ok=True)
+    path = os.path.join(settings.PROFILING_DUMP_DIR, f'profile-{os.getpid()}.json')
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump({'written_at': time.time(), 'samples': raw_samples()}, f)
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_dumps(max_age):
+    """The samples of every dump written in the last max_age seconds, merged
+    per view; older dumps are deleted.
+    """
+    cutoff = time.time() - max_age
+    merged = defaultdict(list)
+    for path in glob.glob(os.path.join(settings.PROFILING_DUMP_DIR, 'profile-*.json')):
+        with open(path) as f:
+            data = json.load(f)
+        if data['written_at'] < cutoff:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            continue
+        for view_name, samples in data['samples'].items():
+            merged[view_name].extend(samples)
+    return merged
+
+
+def reset():
+    global _recorded
+    with _lock:
+        _samples.clear()
+        _recorded = 0
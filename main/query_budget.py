@@ -0,0 +1,93 @@
+import contextlib
+import functools
+import logging
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+@contextlib.contextmanager
+def execute_wrapper(wrapper):
+    """connection.execute_wrapper() on every database, replicas included."""
+    with contextlib.ExitStack() as stack:
+        for conn in connections.all():
+            stack.enter_context(conn.execute_wrapper(wrapper))
+        yield
+
+
+@contextlib.asynccontextmanager
+async def async_execute_wrapper(wrapper):
+    """execute_wrapper() for async code.
+
+    The async ORM runs its queries on the request's sync thread, whose
+    connections are not the ones the event loop sees, so the wrapper has
+    to be installed (and removed) from that thread.
+    """
+    def install():
+        for conn in connections.all():
+            conn.execute_wrappers.append(wrapper)
+
+    def remove():
+        for conn in connections.all():
+            conn.execute_wrappers.remove(wrapper)
+
+    await sync_to_async(install)()
+    try:
+        yield
+    finally:
+        await sync_to_async(remove)()
+
+
+def query_budget(max_queries):
+    """Cap the number of SQL queries a view (including its template) may run.
+
+    Over budget raises QueryBudgetExceeded when QUERY_BUDGET_STRICT is on
+    (development and the test client), and only logs a warning otherwise.
+    Works for both sync and async views.
+    """
+    def decorator(view_func):
+        def check(queries):
+            if len(queries) > max_queries:
+                message = (f'{view_func.__name__} ran {len(queries)} queries, '
+                           f'budget is {max_queries}:\n' + '\n'.join(queries))
+                if getattr(settings, 'QUERY_BUDGET_STRICT', False):
+                    raise QueryBudgetExceeded(message)
+                logger.warning(message)
+
+        if iscoroutinefunction(view_func):
+            @functools.wraps(view_func)
+            async def wrapper(request, *args, **kwargs):
+                queries = []
+
+                def record(execute, sql, params, many, context):
+                    queries.append(sql)
+                    return execute(sql, params, many, context)
+
+                async with async_execute_wrapper(record):
+                    response = await view_func(request, *args, **kwargs)
+                check(queries)
+                return response
+        else:
+            @functools.wraps(view_func)
+            def wrapper(request, *args, **kwargs):
+                queries = []
+
+                def record(execute, sql, params, many, context):
+                    queries.append(sql)
+                    return execute(sql, params, many, context)
+
+                with execute_wrapper(record):
+                    response = view_func(request, *args, **kwargs)
+                check(queries)
+                return response
+
+        wrapper.query_budget = max_queries
+        return wrapper
+    return decorator
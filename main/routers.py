@@ -0,0 +1,43 @@
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+
+# Routing state of the current request, set by ReplicaRoutingMiddleware:
+# {'replica': may reads use a replica, 'wrote': did the request write}.
+# Outside a request (commands, shell, workers) everything uses the primary.
+current_routing = ContextVar('current_routing', default=None)
+
+# Sessions and accounts are read right after they are written (login,
+# registration), so they never come from a lagging replica
+PRIMARY_ONLY_APPS = {'auth', 'sessions', 'contenttypes', 'admin'}
+
+
+def new_routing(replica):
+    return {'replica': replica, 'wrote': False}
+
+
+class ReplicaRouter:
+    """Send reads of allowlisted requests to a random replica from
+    REPLICA_DATABASES; everything else, and every write, goes to default.
+    """
+
+    def db_for_read(self, model, **hints):
+        routing = current_routing.get()
+        if (routing and routing['replica'] and settings.REPLICA_DATABASES
+                and model._meta.app_label not in PRIMARY_ONLY_APPS):
+            return random.choice(settings.REPLICA_DATABASES)
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        routing = current_routing.get()
+        if routing is not None:
+            routing['wrote'] = True
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
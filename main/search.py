@@ -0,0 +1,104 @@
+import re
+
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Car, Part, SearchToken
+
+TOKEN_RE = re.compile(r'\w+')
+MAX_TOKEN_LENGTH = 50
+INDEX_BATCH_SIZE = 2000
+
+
+def tokenize(text):
+    return {token[:MAX_TOKEN_LENGTH] for token in TOKEN_RE.findall((text or '').lower())}
+
+
+def car_tokens(car):
+    return tokenize(' '.join([car.model, car.color, car.company_name]))
+
+
+def part_tokens(part):
+    return tokenize(' '.join([part.name, part.category, part.company_name]))
+
+
+def _replace_tokens(kind, objects, tokens_for):
+    ids = [obj.pk for obj in objects]
+    SearchToken.objects.filter(kind=kind, object_id__in=ids).delete()
+    SearchToken.objects.bulk_create(
+        [SearchToken(kind=kind, object_id=obj.pk, token=token)
+         for obj in objects for token in tokens_for(obj)],
+        batch_size=INDEX_BATCH_SIZE,
+    )
+
+
+def index_car(car):
+    _replace_tokens('car', [car], car_tokens)
+
+
+def index_part(part):
+    _replace_tokens('part', [part], part_tokens)
+
+
+def index_cars(cars):
+    _replace_tokens('car', cars, car_tokens)
+
+
+def index_parts(parts):
+    _replace_tokens('part', parts, part_tokens)
+
+
+def unindex(kind, object_id):
+    SearchToken.objects.filter(kind=kind, object_id=object_id).delete()
+
+
+def _index_in_batches(kind, queryset, tokens_for):
+    batch = []
+    for obj in queryset.iterator(chunk_size=INDEX_BATCH_SIZE):
+        batch.append(obj)
+        if len(batch) >= INDEX_BATCH_SIZE:
+            _replace_tokens(kind, batch, tokens_for)
+            batch = []
+    if batch:
+        _replace_tokens(kind, batch, tokens_for)
+
+
+def index_company(company):
+    # The company name is part of every car's and part's tokens; call this
+    # after company_name has been updated
+    _index_in_batches('car', Car.objects.filter(company=company), car_tokens)
+    _index_in_batches('part', Part.objects.filter(company=company), part_tokens)
+
+
+def rebuild_index():
+    SearchToken.objects.all().delete()
+    _index_in_batches('car', Car.objects.all(), car_tokens)
+    _index_in_batches('part', Part.objects.all(), part_tokens)
+
+
+def filter_matches(queryset, kind, query):
+    """Keep rows where every word of the query prefixes one of their tokens."""
+    terms = tokenize(query)
+    if query and not terms:
+        # Punctuation alone ("!!!", "-") matches nothing, as icontains did
+        return queryset.none()
+    for term in terms:
+        matches = SearchToken.objects.filter(kind=kind, token__startswith=term)
+        queryset = queryset.filter(pk__in=matches.values('object_id'))
+    return queryset
+
+
+def annotate_rank(queryset, kind, query):
+    """Add a `search_rank` of whole-word hits to already matched rows."""
+    terms = tokenize(query)
+    exact_hits = (SearchToken.objects
+                  .filter(kind=kind, object_id=OuterRef('pk'), token__in=terms)
+                  .values('object_id')
+                  .annotate(hits=Count('pk'))
+                  .values('hits'))
+    return queryset.annotate(search_rank=Coalesce(Subquery(exact_hits, output_field=IntegerField()), 0))
+
+
+def rank_matches(queryset, kind, query):
+    """filter_matches() plus a `search_rank` of whole-word hits, best first."""
+    return annotate_rank(filter_matches(queryset, kind, query), kind, query).order_by('-search_rank', '-pk')
@@ -0,0 +1,156 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Car, CarPurchase, Company, Part, PartOrder, PartOrderItem
+from .page_cache import home_page
+from .stats import record_part_order_items
+
+
+class EmptyCart(Exception):
+    pass
+
+
+class CarUnavailable(Exception):
+    pass
+
+
+class UsernameTaken(Exception):
+    pass
+
+
+class OutOfStock(Exception):
+    def __init__(self, parts):
+        self.parts = parts
+        super().__init__(', '.join(part.name for part in parts))
+
+
+def checkout_cart(cart, payment_method, shipping_address):
+    """Turn a cart into a PartOrder atomically.
+
+    Stock is decremented with a conditional UPDATE per line, so two
+    concurrent checkouts can never sell more than is on the shelf; if any
+    line is short the whole order is rolled back and OutOfStock lists the
+    offending parts.
+    """
+    with transaction.atomic():
+        summary = cart.get_summary()
+        if not summary.items:
+            raise EmptyCart()
+
+        # Lock rows in a fixed order so concurrent checkouts can't deadlock
+        short = []
+        for item in sorted(summary.items, key=lambda item: item.part_id):
+            updated = (Part.objects
+                       .filter(pk=item.part_id, stock__gte=item.quantity)
+                       .update(stock=F('stock') - item.quantity, updated_at=timezone.now()))
+            if not updated:
+                short.append(item.part)
+        if short:
+            raise OutOfStock(short)
+
+        order = PartOrder.objects.create(
+            user=cart.user,
+            total_amount=summary.total,
+            payment_method=payment_method,
+            shipping_address=shipping_address,
+            status='pending'
+        )
+        order_items = PartOrderItem.objects.bulk_create([
+            PartOrderItem(order=order, part=item.part, quantity=item.quantity, price=item.part.price)
+            for item in summary.items
+        ])
+        record_part_order_items(order_items)
+        cart.cartitem_set.all().delete()
+    return order
+
+
+def reserve_car(car, user, payment_method):
+    """Reserve a car for `user` with a single compare-and-set UPDATE.
+
+    Only one of any number of concurrent buyers can flip the row from
+    available (or from a lapsed reservation) to reserved; everyone else
+    gets CarUnavailable without having written anything.
+    """
+    now = timezone.now()
+    reserved_until = now + timedelta(minutes=settings.CAR_RESERVATION_MINUTES)
+    claimable = Q(status='available') | Q(status='reserved', reserved_until__lt=now)
+    with transaction.atomic():
+        updated = (Car.objects
+                   .filter(claimable, pk=car.pk)
+                   .update(status='reserved', reserved_until=reserved_until, updated_at=now))
+        if not updated:
+            raise CarUnavailable()
+        # Whoever held the lapsed reservation loses it
+        CarPurchase.objects.filter(car=car, status='pending').update(status='cancelled')
+        purchase = CarPurchase.objects.create(
+            user=user,
+            car=car,
+            total_price=car.price,
+            payment_method=payment_method,
+            status='pending'
+        )
+    car.status, car.reserved_until = 'reserved', reserved_until
+    # update() sends no post_save, and the car leaves the featured list
+    home_page.invalidate()
+    return purchase
+
+
+def confirm_reservation(purchase):
+    # Paid cars stay reserved for good
+    Car.objects.filter(pk=purchase.car_id, status='reserved').update(reserved_until=None)
+
+
+def release_reservation(purchase):
+    still_held = (CarPurchase.objects
+                  .filter(car_id=purchase.car_id, status__in=['pending', 'paid', 'confirmed'])
+                  .exists())
+    if not still_held:
+        released = Car.objects.filter(pk=purchase.car_id, status='reserved').update(
+            status='available', reserved_until=None, updated_at=timezone.now())
+        if released:
+            home_page.invalidate()
+
+
+def expire_reservations():
+    """Put cars whose unpaid reservation lapsed back on sale."""
+    now = timezone.now()
+    with transaction.atomic():
+        expired = list(Car.objects
+                       .select_for_update()
+                       .filter(status='reserved', reserved_until__lt=now)
+                       .values_list('pk', flat=True))
+        CarPurchase.objects.filter(car_id__in=expired, status='pending').update(status='cancelled')
+        Car.objects.filter(pk__in=expired).update(status='available', reserved_until=None, updated_at=now)
+    if expired:
+        home_page.invalidate()
+    return len(expired)
+
+
+def create_company_account(company_request):
+    """Create the login and Company of an approved CompanyRequest. Does
+    nothing if they already exist, so a retried job is harmless. Raises
+    UsernameTaken if someone else registered the username since approval.
+    """
+    username = company_request.requested_username
+    with transaction.atomic():
+        if Company.objects.filter(user__username=username).exists():
+            return None
+        if User.objects.filter(username=username).exists():
+            raise UsernameTaken(username)
+        try:
+            with transaction.atomic():
+                user = User.objects.create_user(username=username, password=company_request.requested_password)
+        except IntegrityError:
+            raise UsernameTaken(username)
+        return Company.objects.create(
+            user=user,
+            name=company_request.company_name,
+            country=company_request.country,
+            description=company_request.description,
+            established_year=company_request.established_year
+        )
@@ -0,0 +1,36 @@
+import time
+
+from django.conf import settings
+
+# Session engines for the SESSION_TIER setting. They are Django's db,
+# cached_db and signed_cookies engines, except that a session whose data is
+# what was loaded is not written again: SESSION_SAVE_EVERY_REQUEST, or code
+# that stores a value the session already holds, would otherwise write it on
+# every request. It is still re-saved once its last write is
+# SESSION_REFRESH_SECONDS old, so its expiry (and a signed cookie's
+# timestamp) keeps moving on.
+WRITTEN_AT_KEY = '_written_at'
+
+
+class SkipUnchangedMixin:
+    _loaded_data = None
+
+    def _fingerprint(self, data):
+        return self.serializer().dumps({key: value for key, value in data.items() if key != WRITTEN_AT_KEY})
+
+    def load(self):
+        data = super().load()
+        self._loaded_data = self._fingerprint(data)
+        return data
+
+    def save(self, must_create=False):
+        data = self._get_session(no_load=must_create)
+        written_at = data.get(WRITTEN_AT_KEY, 0)
+        if (not must_create and self.session_key is not None
+                and self._loaded_data == self._fingerprint(data)
+                and time.time() - written_at < settings.SESSION_REFRESH_SECONDS):
+            return
+        # Set on the dict itself, which does not mark the session modified
+        data[WRITTEN_AT_KEY] = int(time.time())
+        super().save(must_create=must_create)
+        self._loaded_data = self._fingerprint(data)
@@ -0,0 +1,7 @@
+from django.contrib.sessions.backends import signed_cookies
+
+from . import SkipUnchangedMixin
+
+
+class SessionStore(SkipUnchangedMixin, signed_cookies.SessionStore):
+    pass
@@ -0,0 +1,232 @@
+from django.contrib.auth.models import User
+from django.core.signals import request_finished, request_started
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from . import db_pool, images, jobs, search, storage
+from .page_cache import home_page
+from .models import (Car, CarPurchase, Company, CompanyRequest, CompanyStats, LoanApplication, Part,
+                     PartOrder, PartOrderItem, TestDrive)
+from .stats import (bump_company_stats, car_company_id, invalidate_admin_stats, rebuild_company_stats,
+                    refresh_compatible_cars_counts)
+
+
+# ---------- Denormalized company fields ----------
+@receiver(pre_save, sender=Car)
+@receiver(pre_save, sender=Part)
+def copy_company_name(sender, instance, raw=False, **kwargs):
+    if not raw:
+        instance.company_name = instance.company.name
+
+@receiver(pre_save, sender=Company)
+def remember_company_name(sender, instance, raw=False, **kwargs):
+    instance._previous_name = None
+    if instance.pk and not raw:
+        instance._previous_name = Company.objects.filter(pk=instance.pk).values_list('name', flat=True).first()
+
+@receiver(post_save, sender=Company)
+def rename_company(sender, instance, created, raw=False, **kwargs):
+    if raw or created or instance._previous_name == instance.name:
+        return
+    # Rewriting every car and part of a large dealer is too slow for the request
+    jobs.enqueue('company_name', company_id=instance.pk)
+
+@receiver(m2m_changed, sender=Part.compatible_cars.through)
+def count_compatible_cars(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_clear' and reverse:
+        instance._cleared_part_ids = list(instance.part_set.values_list('pk', flat=True))
+    elif action == 'post_clear':
+        refresh_compatible_cars_counts(instance._cleared_part_ids if reverse else [instance.pk])
+    elif action in ('post_add', 'post_remove') and pk_set:
+        refresh_compatible_cars_counts(pk_set if reverse else [instance.pk])
+
+# Deleting a car drops its compatibility rows without an m2m_changed
+@receiver(pre_delete, sender=Car)
+def remember_compatible_parts(sender, instance, **kwargs):
+    instance._compatible_part_ids = list(instance.part_set.values_list('pk', flat=True))
+
+@receiver(post_delete, sender=Car)
+def recount_compatible_parts(sender, instance, **kwargs):
+    refresh_compatible_cars_counts(instance._compatible_part_ids)
+
+
+# ---------- Search index ----------
+@receiver(post_save, sender=Car)
+def index_car(sender, instance, raw=False, **kwargs):
+    if not raw:
+        search.index_car(instance)
+
+@receiver(post_save, sender=Part)
+def index_part(sender, instance, raw=False, **kwargs):
+    if not raw:
+        search.index_part(instance)
+
+@receiver(post_delete, sender=Car)
+def unindex_car(sender, instance, **kwargs):
+    search.unindex('car', instance.pk)
+
+@receiver(post_delete, sender=Part)
+def unindex_part(sender, instance, **kwargs):
+    search.unindex('part', instance.pk)
+
+
+# ---------- Company dashboard counters ----------
+@receiver(post_save, sender=Company)
+def create_company_stats(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        CompanyStats.objects.get_or_create(company=instance)
+
+@receiver(post_save, sender=Car)
+def count_car(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        bump_company_stats(instance.company_id, total_cars=1)
+
+# Moving a car or part to another company (the admin allows it) moves its
+# own count and those of the purchases, requests and orders on it: recount both
+@receiver(pre_save, sender=Car)
+@receiver(pre_save, sender=Part)
+def remember_company(sender, instance, raw=False, **kwargs):
+    instance._previous_company_id = None
+    if instance.pk and not raw:
+        instance._previous_company_id = sender.objects.filter(pk=instance.pk).values_list('company_id', flat=True).first()
+
+@receiver(post_save, sender=Car)
+@receiver(post_save, sender=Part)
+def recount_moved(sender, instance, created, raw=False, **kwargs):
+    previous = getattr(instance, '_previous_company_id', None)
+    if created or raw or previous is None or previous == instance.company_id:
+        return
+    rebuild_company_stats(Company.objects.filter(pk__in=[previous, instance.company_id]))
+
+@receiver(post_delete, sender=Car)
+def uncount_car(sender, instance, **kwargs):
+    bump_company_stats(instance.company_id, total_cars=-1)
+
+@receiver(post_save, sender=Part)
+def count_part(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        bump_company_stats(instance.company_id, total_parts=1)
+
+@receiver(post_delete, sender=Part)
+def uncount_part(sender, instance, **kwargs):
+    bump_company_stats(instance.company_id, total_parts=-1)
+
+@receiver(post_save, sender=CarPurchase)
+def count_car_purchase(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        bump_company_stats(car_company_id(instance.car_id), car_purchases=1)
+
+@receiver(post_delete, sender=CarPurchase)
+def uncount_car_purchase(sender, instance, **kwargs):
+    bump_company_stats(car_company_id(instance.car_id), car_purchases=-1)
+
+@receiver(post_save, sender=PartOrderItem)
+def count_part_order_item(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        bump_company_stats(instance.part.company_id, part_orders=1)
+
+@receiver(post_delete, sender=PartOrderItem)
+def uncount_part_order_item(sender, instance, **kwargs):
+    company_id = Part.objects.filter(pk=instance.part_id).values_list('company_id', flat=True).first()
+    bump_company_stats(company_id, part_orders=-1)
+
+# Test drives and loans count while pending, so track status transitions
+PENDING_COUNTERS = {TestDrive: 'pending_test_drives', LoanApplication: 'pending_loans'}
+
+@receiver(pre_save, sender=TestDrive)
+@receiver(pre_save, sender=LoanApplication)
+def remember_status(sender, instance, raw=False, **kwargs):
+    instance._previous_status = None
+    if instance.pk and not raw:
+        instance._previous_status = sender.objects.filter(pk=instance.pk).values_list('status', flat=True).first()
+
+@receiver(post_save, sender=TestDrive)
+@receiver(post_save, sender=LoanApplication)
+def count_pending(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    delta = (instance.status == 'pending') - (getattr(instance, '_previous_status', None) == 'pending')
+    if delta:
+        bump_company_stats(car_company_id(instance.car_id), **{PENDING_COUNTERS[sender]: delta})
+
+@receiver(post_delete, sender=TestDrive)
+@receiver(post_delete, sender=LoanApplication)
+def uncount_pending(sender, instance, **kwargs):
+    if instance.status == 'pending':
+        bump_company_stats(car_company_id(instance.car_id), **{PENDING_COUNTERS[sender]: -1})
+
+
+# ---------- Admin dashboard cache ----------
+ADMIN_STATS_MODELS = [Company, User, TestDrive, LoanApplication, CompanyRequest, CarPurchase, PartOrder]
+
+def expire_admin_stats(sender, update_fields=None, **kwargs):
+    # Every login saves last_login, which none of the counts depend on
+    if update_fields and set(update_fields) == {'last_login'}:
+        return
+    invalidate_admin_stats()
+
+for model in ADMIN_STATS_MODELS:
+    post_save.connect(expire_admin_stats, sender=model, dispatch_uid=f'admin_stats_save_{model.__name__}')
+    post_delete.connect(expire_admin_stats, sender=model, dispatch_uid=f'admin_stats_delete_{model.__name__}')
+
+
+# ---------- Homepage cache ----------
+# The homepage lists featured cars and companies
+def expire_home_page(sender, **kwargs):
+    home_page.invalidate()
+
+for model in (Car, Company):
+    post_save.connect(expire_home_page, sender=model, dispatch_uid=f'home_page_save_{model.__name__}')
+    post_delete.connect(expire_home_page, sender=model, dispatch_uid=f'home_page_delete_{model.__name__}')
+
+
+# ---------- Image variants ----------
+IMAGE_FIELDS = {Car: 'image', Part: 'image', Company: 'logo'}
+
+def build_image_variants(sender, instance, raw=False, **kwargs):
+    name = getattr(instance, IMAGE_FIELDS[sender]).name
+    if name and not raw and not images.has_variants(name):
+        jobs.enqueue('image_variants', name=name)
+
+for model in IMAGE_FIELDS:
+    post_save.connect(build_image_variants, sender=model, dispatch_uid=f'image_variants_{model.__name__}')
+
+
+# ---------- Shared media files ----------
+def remember_media_file(sender, instance, raw=False, **kwargs):
+    instance._previous_media_name = None
+    if instance.pk and not raw:
+        instance._previous_media_name = (sender.objects.filter(pk=instance.pk)
+                                         .values_list(IMAGE_FIELDS[sender], flat=True).first())
+
+def release_replaced_media_file(sender, instance, raw=False, **kwargs):
+    previous = getattr(instance, '_previous_media_name', None)
+    if previous and previous != getattr(instance, IMAGE_FIELDS[sender]).name:
+        transaction.on_commit(lambda: storage.release(previous))
+
+def release_deleted_media_file(sender, instance, **kwargs):
+    name = getattr(instance, IMAGE_FIELDS[sender]).name
+    if name:
+        transaction.on_commit(lambda: storage.release(name))
+
+for model in IMAGE_FIELDS:
+    pre_save.connect(remember_media_file, sender=model, dispatch_uid=f'media_pre_save_{model.__name__}')
+    post_save.connect(release_replaced_media_file, sender=model, dispatch_uid=f'media_post_save_{model.__name__}')
+    post_delete.connect(release_deleted_media_file, sender=model, dispatch_uid=f'media_delete_{model.__name__}')
+
+
+
+# ---------- Database connections ----------
+@receiver(connection_created)
+def track_connection(sender, connection, **kwargs):
+    db_pool.connection_opened(connection)
+
+@receiver(request_started)
+def count_reused_connections(sender, **kwargs):
+    db_pool.request_started()
+
+@receiver(request_finished)
+def close_surplus_connections(sender, **kwargs):
+    db_pool.request_finished()
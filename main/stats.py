@@ -0,0 +1,122 @@
+from collections import Counter
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import (Car, CarPurchase, Company, CompanyRequest, CompanyStats, LoanApplication, Part,
+                     PartOrder, PartOrderItem, TestDrive)
+
+# ---------- Company dashboard counters ----------
+# Each counter is the grouped count of one queryset per company.
+COMPANY_COUNTERS = {
+    'total_cars': (Car.objects.all(), 'company'),
+    'total_parts': (Part.objects.all(), 'company'),
+    'pending_test_drives': (TestDrive.objects.filter(status='pending'), 'car__company'),
+    'pending_loans': (LoanApplication.objects.filter(status='pending'), 'car__company'),
+    'car_purchases': (CarPurchase.objects.all(), 'car__company'),
+    'part_orders': (PartOrderItem.objects.all(), 'part__company'),
+}
+
+
+def bump_company_stats(company_id, **deltas):
+    deltas = {field: delta for field, delta in deltas.items() if delta}
+    if company_id and deltas:
+        CompanyStats.objects.filter(company_id=company_id).update(
+            **{field: F(field) + delta for field, delta in deltas.items()}
+        )
+
+
+def record_part_order_items(items):
+    # bulk_create() sends no post_save, so checkout reports its items here
+    per_company = Counter(item.part.company_id for item in items)
+    for company_id, count in per_company.items():
+        bump_company_stats(company_id, part_orders=count)
+
+
+def car_company_id(car_id):
+    return Car.objects.filter(pk=car_id).values_list('company_id', flat=True).first()
+
+
+def rebuild_company_stats(companies=None):
+    companies = list(companies if companies is not None else Company.objects.all())
+    ids = [company.pk for company in companies]
+    values = {company_id: {} for company_id in ids}
+    for field, (queryset, company_path) in COMPANY_COUNTERS.items():
+        rows = (queryset.filter(**{f'{company_path}__in': ids})
+                .order_by()
+                .values(company_path)
+                .annotate(n=Count('pk')))
+        for row in rows:
+            values[row[company_path]][field] = row['n']
+    for company_id in ids:
+        counts = {field: values[company_id].get(field, 0) for field in COMPANY_COUNTERS}
+        CompanyStats.objects.update_or_create(company_id=company_id, defaults=counts)
+
+
+def company_stats(company):
+    try:
+        return CompanyStats.objects.get(company=company)
+    except CompanyStats.DoesNotExist:
+        rebuild_company_stats([company])
+        return CompanyStats.objects.get(company=company)
+
+
+# ---------- Part compatibility counts ----------
+def refresh_compatible_cars_counts(part_ids):
+    part_ids = list(part_ids or [])
+    if not part_ids:
+        return
+    links = (Part.compatible_cars.through.objects.filter(part_id=OuterRef('pk')).order_by()
+             .values('part_id').annotate(total=Count('pk')).values('total'))
+    # updated_at: the count is shown on the cached part card
+    Part.objects.filter(pk__in=part_ids).update(
+        compatible_cars_count=Coalesce(Subquery(links, output_field=IntegerField()), 0),
+        updated_at=timezone.now(),
+    )
+
+
+# ---------- Admin dashboard ----------
+ADMIN_STATS_CACHE_KEY = 'main:admin_stats'
+
+
+def admin_counters():
+    return {
+        'total_companies': Company.objects.all(),
+        'total_users': User.objects.filter(is_staff=False, company__isnull=True),
+        'pending_test_drives': TestDrive.objects.filter(status='pending'),
+        'pending_loans': LoanApplication.objects.filter(status='pending'),
+        'pending_company_requests': CompanyRequest.objects.filter(status='pending'),
+        'total_car_purchases': CarPurchase.objects.all(),
+        'total_part_orders': PartOrder.objects.all(),
+    }
+
+
+def count_in_one_query(querysets):
+    # SELECT (SELECT COUNT(*) FROM (...) c0) AS a, (SELECT COUNT(*) ...) AS b
+    columns, params = [], []
+    for i, (name, queryset) in enumerate(querysets.items()):
+        sql, sql_params = queryset.order_by().values('pk').query.sql_with_params()
+        columns.append(f'(SELECT COUNT(*) FROM ({sql}) c{i}) AS {connection.ops.quote_name(name)}')
+        params.extend(sql_params)
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT ' + ', '.join(columns), params)
+        return dict(zip(querysets, cursor.fetchone()))
+
+
+def admin_stats():
+    stats = cache.get(ADMIN_STATS_CACHE_KEY)
+    if stats is None:
+        stats = count_in_one_query(admin_counters())
+        cache.set(ADMIN_STATS_CACHE_KEY, stats, settings.ADMIN_STATS_CACHE_SECONDS)
+    return stats
+
+
+def invalidate_admin_stats():
+    # Only once committed: a dashboard request before that would cache the
+    # old counts again for the whole timeout
+    transaction.on_commit(lambda: cache.delete(ADMIN_STATS_CACHE_KEY))
@@ -0,0 +1,84 @@
+import hashlib
+import os
+import posixpath
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.apps import apps
+from django.core.files import File, locks
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.utils import timezone
+
+# Model fields that hold uploads; used to count references to a stored file
+MEDIA_FIELDS = [('main.Car', 'image'), ('main.Part', 'image'), ('main.Company', 'logo')]
+# A stored file reused by an upload counts as referenced for this long: the
+# row that refers to it is only committed once the upload's request ends
+CLAIM_SECONDS = 10 * 60
+
+
+@contextmanager
+def media_lock(storage):
+    """Exclusive, across processes, between reusing and deleting stored files."""
+    os.makedirs(storage.location, exist_ok=True)
+    with open(os.path.join(storage.location, '.lock'), 'a') as f:
+        locks.lock(f, locks.LOCK_EX)
+        try:
+            yield
+        finally:
+            locks.unlock(f)
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """FileSystemStorage that names every upload after the SHA-256 of its
+    content (cars/<sha256>.jpg), so uploading the same image again -- from
+    another company or another edit -- reuses the stored file.
+    """
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        content.seek(0)
+
+        extension = os.path.splitext(name)[1].lower()
+        hashed_name = posixpath.join(posixpath.dirname(name), digest.hexdigest() + extension)
+        if self.exists(hashed_name):
+            with media_lock(self):
+                if self.exists(hashed_name):
+                    # Claim it, so release() does not delete it before the
+                    # new reference is committed
+                    os.utime(self.path(hashed_name))
+                    return hashed_name
+        return super().save(hashed_name, content, max_length)
+
+
+def reference_count(name):
+    return sum(
+        apps.get_model(model).objects.filter(**{field: name}).count()
+        for model, field in MEDIA_FIELDS
+    )
+
+
+def release(name):
+    """Delete a stored file (and its variants) once nothing refers to it."""
+    from . import jobs
+    from .images import delete_variants
+
+    if not name:
+        return
+    with media_lock(default_storage):
+        if reference_count(name):
+            return
+        if default_storage.exists(name):
+            claimed_until = default_storage.get_modified_time(name) + timedelta(seconds=CLAIM_SECONDS)
+            if claimed_until > timezone.now():
+                # Possibly just reused by an upload still in flight: look again
+                # once its row must have been committed
+                jobs.enqueue_at(claimed_until, 'release_media', name=name)
+                return
+        default_storage.delete(name)
+        delete_variants(name)
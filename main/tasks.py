@@ -0,0 +1,72 @@
+import logging
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from PIL import Image, UnidentifiedImageError
+
+from . import facets, images, imports, search, storage
+from .jobs import JobFailed, task
+from .models import Car, Company, CompanyRequest, ImportJob, Part
+from .page_cache import home_page
+from .services import UsernameTaken, create_company_account
+
+logger = logging.getLogger(__name__)
+
+# Background tasks for main.jobs, enqueued by name from views and signals.
+
+
+@task('image_variants')
+def build_image_variants(name):
+    if images.has_variants(name):
+        return
+    try:
+        images.generate_variants(name)
+    except (UnidentifiedImageError, Image.DecompressionBombError):
+        # Retrying will not make the upload readable
+        logger.exception('Could not build image variants for %s', name)
+
+
+@task('release_media')
+def release_media(name):
+    storage.release(name)
+
+
+@task('import', max_attempts=1)
+def run_import(job_id):
+    # run_import() records its own failures on the ImportJob
+    imports.run_import(ImportJob.objects.select_related('company').get(pk=job_id))
+
+
+@task('company_account')
+def create_requested_company(request_id):
+    company_request = CompanyRequest.objects.get(pk=request_id)
+    try:
+        create_company_account(company_request)
+    except UsernameTaken:
+        # Someone registered the username after approval; hand the request
+        # back to the admins instead of leaving it approved without a login
+        note = f'Username {company_request.requested_username!r} was taken before the account could be created.'
+        company_request.status = 'pending'
+        company_request.admin_notes = '\n'.join(filter(None, [company_request.admin_notes, note]))
+        company_request.save(update_fields=['status', 'admin_notes'])
+        raise JobFailed(note)
+
+
+@task('company_name')
+def copy_company_name(company_id):
+    # Reads the current name, so a burst of renames settles on the last one
+    company = Company.objects.get(pk=company_id)
+    with transaction.atomic():
+        now = timezone.now()  # updated_at: the cached car and part cards show the name
+        stale = ~Q(company_name=company.name)
+        Car.objects.filter(stale, company=company).update(company_name=company.name, updated_at=now)
+        Part.objects.filter(stale, company=company).update(company_name=company.name, updated_at=now)
+        search.index_company(company)
+    home_page.invalidate()
+
+
+@task('car_facets', max_attempts=1)
+def refresh_car_facets():
+    # The next stale read queues another one, so a failure needs no retry
+    facets.refresh_snapshot()
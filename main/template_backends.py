@@ -0,0 +1,33 @@
+import time
+
+from django.template.backends.django import DjangoTemplates
+
+from . import profiling
+
+
+class ProfiledTemplate:
+    def __init__(self, template):
+        self.template = template
+
+    def __getattr__(self, name):
+        return getattr(self.template, name)
+
+    def render(self, context=None, request=None):
+        sample = profiling.current_sample.get()
+        if sample is None:
+            return self.template.render(context, request)
+        start = time.perf_counter()
+        try:
+            return self.template.render(context, request)
+        finally:
+            sample['template_ms'] += (time.perf_counter() - start) * 1000
+
+
+class ProfilingDjangoTemplates(DjangoTemplates):
+    """DjangoTemplates that adds render time to the current request's profile."""
+
+    def from_string(self, template_code):
+        return ProfiledTemplate(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return ProfiledTemplate(super().get_template(template_name))
@@ -0,0 +1,32 @@
+from django import template
+
+from main.images import FORMATS, variant_name, variant_storage
+
+register = template.Library()
+
+
+def _variant_url(image, variant, ext):
+    name = variant_name(image.name, variant, ext)
+    if variant_storage.exists(name):
+        return variant_storage.url(name)
+    return None
+
+
+@register.simple_tag
+def variant_url(image, variant='card', ext='jpg'):
+    """URL of a resized copy of `image`, or of the original until it exists."""
+    if not image:
+        return ''
+    return _variant_url(image, variant, ext) or image.url
+
+
+@register.inclusion_tag('main/includes/picture.html')
+def picture(image, variant='card', alt='', css_class='', style=''):
+    """<picture> with a WebP source and a JPEG fallback for `variant`."""
+    return {
+        'webp': _variant_url(image, variant, 'webp') if 'webp' in FORMATS else None,
+        'src': variant_url(image, variant, 'jpg'),
+        'alt': alt,
+        'css_class': css_class,
+        'style': style,
+    }
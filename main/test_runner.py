@@ -0,0 +1,14 @@
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class TestRunner(DiscoverRunner):
+    # Test requests must not end up in the site's request profiles
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._profiling_off = override_settings(QUERY_PROFILING=False)
+        self._profiling_off.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._profiling_off.disable()
+        super().teardown_test_environment(**kwargs)
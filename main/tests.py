@@ -1,3 +1,261 @@
-from django.test import TestCase
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from .management.commands.explain_listings import full_table_scans, listing_queries
+from .models import Car, CarPurchase, Company, CompanyStats, LoanApplication, Part, TestDrive
+from .query_budget import QueryBudgetExceeded, query_budget
+from .services import CarUnavailable, reserve_car
+from .stats import COMPANY_COUNTERS, rebuild_company_stats
+
+COLORS = ['red', 'blue', 'black', 'white']
+FUEL_TYPES = ['petrol', 'diesel', 'electric', 'hybrid']
+
+
+def make_catalog(cars, parts, companies=3):
+    owners = [Company.objects.create(name=f'Test Motors {i}', country='Testland') for i in range(companies)]
+    catalog_cars = [
+        Car.objects.create(company=owners[i % companies], model=f'Model {i}', year=2000 + i % 25,
+                           price=Decimal(5000 + i * 750), color=COLORS[i % len(COLORS)],
+                           fuel_type=FUEL_TYPES[i % len(FUEL_TYPES)], mileage=i * 1000, description='Test car')
+        for i in range(cars)
+    ]
+    for i in range(parts):
+        part = Part.objects.create(company=owners[i % companies], name=f'Part {i}', category='Brakes',
+                                   price=Decimal(10 + i), stock=5, description='Test part')
+        part.compatible_cars.set(catalog_cars[i % cars:i % cars + 3])
+    return owners, catalog_cars
+
+
+@override_settings(QUERY_BUDGET_STRICT=True)
+class QueryBudgetTests(TestCase):
+    """The public pages stay within their @query_budget however big the
+    catalog is; a view that goes over it raises.
+    """
+    CARS = 40
+    PARTS = 40
+
+    @classmethod
+    def setUpTestData(cls):
+        owners, cars = make_catalog(cls.CARS, cls.PARTS)
+        cls.car = cars[0]
+        cls.user = User.objects.create_user('budget_user', password='pw')
+        cls.company_user = User.objects.create_user('budget_company', password='pw')
+        owners[0].user = cls.company_user
+        owners[0].save()
+
+    def setUp(self):
+        # Fragment, page and facet caches would hide queries
+        cache.clear()
+
+    def pages(self):
+        return [
+            ('home', reverse('main:home'), {}),
+            ('car_list', reverse('main:car_list'), {}),
+            ('car_list filtered', reverse('main:car_list'), {'fuel_type': 'petrol', 'sort': 'price_desc'}),
+            ('car_list search', reverse('main:car_list'), {'search': 'model', 'color': 'red'}),
+            ('car_detail', reverse('main:car_detail', args=[self.car.pk]), {}),
+            ('part_list', reverse('main:part_list'), {}),
+            ('part_list search', reverse('main:part_list'), {'search': 'part', 'sort': 'price_asc'}),
+        ]
+
+    def assert_within_budget(self):
+        for name, url, params in self.pages():
+            with self.subTest(page=name):
+                cache.clear()
+                try:
+                    response = self.client.get(url, params)
+                except QueryBudgetExceeded as e:
+                    self.fail(str(e))
+                self.assertEqual(response.status_code, 200)
+
+    def test_anonymous_pages_within_budget(self):
+        self.assert_within_budget()
+
+    def test_user_pages_within_budget(self):
+        self.client.force_login(self.user)
+        self.assert_within_budget()
+
+    def test_company_pages_within_budget(self):
+        self.client.force_login(self.company_user)
+        self.assert_within_budget()
+
+    def test_next_page_within_budget(self):
+        response = self.client.get(reverse('main:car_list'))
+        cursor = response.context['page'].next_cursor
+        self.assertIsNotNone(cursor)
+        response = self.client.get(reverse('main:car_list'), {'after': cursor})
+        self.assertEqual(response.status_code, 200)
+
+    def test_over_budget_view_raises(self):
+        @query_budget(1)
+        def view(request):
+            list(Car.objects.all())
+            list(Part.objects.all())
+            return HttpResponse()
+
+        with self.assertRaises(QueryBudgetExceeded):
+            view(RequestFactory().get('/'))
+
+    @override_settings(QUERY_BUDGET_STRICT=False)
+    def test_over_budget_view_only_logs_when_not_strict(self):
+        @query_budget(1)
+        def view(request):
+            list(Car.objects.all())
+            list(Part.objects.all())
+            return HttpResponse()
+
+        with self.assertLogs('main.query_budget', 'WARNING'):
+            response = view(RequestFactory().get('/'))
+        self.assertEqual(response.status_code, 200)
+
+
+class ReservationRaceTests(TransactionTestCase):
+    """Many buyers reserving one car at the same moment: exactly one wins."""
+    THREADS = 12
+    ROUNDS = 5
+
+    def setUp(self):
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            self.skipTest("Threads can't share an in-memory SQLite test database")
+
+    def race(self, car, users):
+        start = threading.Barrier(len(users))
+
+        def buy(user):
+            try:
+                start.wait()
+                reserve_car(Car.objects.get(pk=car.pk), user, 'cash')
+                return True
+            except CarUnavailable:
+                return False
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=len(users)) as pool:
+            return list(pool.map(buy, users))
+
+    def test_one_winner_per_car(self):
+        _, cars = make_catalog(self.ROUNDS, 0, companies=1)
+        users = [User.objects.create_user(f'racer{i}', password='pw') for i in range(self.THREADS)]
+        for car in cars:
+            with self.subTest(car=car.pk):
+                results = self.race(car, users)
+                self.assertEqual(results.count(True), 1)
+                self.assertEqual(CarPurchase.objects.filter(car=car).count(), 1)
+                car.refresh_from_db()
+                self.assertEqual(car.status, 'reserved')
+
+
+class ListingPlanTests(TestCase):
+    """No listing query falls back to a full table scan (the same check as
+    `manage.py explain_listings`).
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        make_catalog(200, 50)
+        if connection.vendor == 'mysql':
+            # Fresh statistics, or the optimizer may take the tables for empty
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE TABLE main_car, main_part')
+
+    def setUp(self):
+        if connection.vendor not in ('mysql', 'sqlite'):
+            self.skipTest(f'No EXPLAIN parser for {connection.vendor}')
+
+    def test_listing_queries_use_an_index(self):
+        for name, queryset in listing_queries().items():
+            with self.subTest(query=name):
+                self.assertEqual(full_table_scans(queryset), [])
+
+
+class CompanyCounterTests(TestCase):
+    """The incremental dashboard counters agree with a full rebuild."""
+
+    def counters(self, company):
+        return CompanyStats.objects.filter(company=company).values(*COMPANY_COUNTERS).get()
+
+    def assert_matches_rebuild(self, *companies):
+        incremental = [self.counters(company) for company in companies]
+        rebuild_company_stats(companies)
+        self.assertEqual(incremental, [self.counters(company) for company in companies])
+
+    def test_moving_a_car_moves_its_counts(self):
+        (old, new), (car, _) = make_catalog(2, 2, companies=2)
+        user = User.objects.create_user('counter_user', password='pw')
+        reserve_car(car, user, 'cash')
+        TestDrive.objects.create(user=user, car=car, date='2030-01-01', time='10:00')
+        LoanApplication.objects.create(user=user, car=car, amount=Decimal(1000), duration_months=12,
+                                       monthly_income=Decimal(3000), employment_status='Employed')
+
+        car.refresh_from_db()
+        car.company = new
+        car.save()
+        self.assertEqual(self.counters(old)['total_cars'], 0)
+        self.assertEqual(self.counters(new)['pending_loans'], 1)
+        self.assert_matches_rebuild(old, new)
+
+    def test_moving_a_part_moves_its_counts(self):
+        (old, new), _ = make_catalog(2, 2, companies=2)
+        part = Part.objects.get(company=old)
+        part.company = new
+        part.save()
+        self.assertEqual(self.counters(new)['total_parts'], 2)
+        self.assert_matches_rebuild(old, new)
+
+
+class CarSearchTests(TestCase):
+    """Car searches default to best match first, across pages."""
+
+    def test_whole_word_matches_rank_first(self):
+        company = Company.objects.create(name='Search Motors', country='Testland')
+        for i in range(30):
+            # 'red' matches 'redwood' as a prefix; 'Red Civic' hits both words exactly
+            model, color = ('Civic', 'red') if i == 10 else ('Civicx', 'redwood')
+            Car.objects.create(company=company, model=model, year=2020, price=Decimal(9000 + i), color=color,
+                               fuel_type='petrol', mileage=0, description='Test car')
+
+        response = self.client.get(reverse('main:car_list'), {'search': 'red civic'})
+        self.assertEqual(response.context['cars'].object_list[0].model, 'Civic')
+        self.assertTrue(any(choice['value'] == 'relevance' and choice['selected']
+                            for choice in response.context['sort_choices']))
+
+        seen = [car.pk for car in response.context['cars']]
+        cursor = response.context['page'].next_cursor
+        while cursor:
+            response = self.client.get(reverse('main:car_list'), {'search': 'red civic', 'after': cursor})
+            seen += [car.pk for car in response.context['cars']]
+            cursor = response.context['page'].next_cursor
+        self.assertEqual(sorted(seen), sorted(Car.objects.values_list('pk', flat=True)))
+
+
+class DealerEditTests(TestCase):
+    """Editing a car never undoes a buyer's reservation."""
+
+    def test_edit_keeps_reservation(self):
+        (company,), (car,) = make_catalog(1, 0, companies=1)
+        dealer = User.objects.create_user('edit_dealer', password='pw')
+        company.user = dealer
+        company.save()
+        buyer = User.objects.create_user('edit_buyer', password='pw')
+        reserve_car(car, buyer, 'cash')
+
+        self.client.force_login(dealer)
+        response = self.client.post(reverse('main:company_car_edit', args=[car.pk]), {
+            'model': 'Renamed', 'year': car.year, 'price': car.price, 'color': car.color,
+            'fuel_type': car.fuel_type, 'mileage': car.mileage, 'description': car.description,
+            'status': 'available',
+        })
+        self.assertEqual(response.status_code, 302)
+        car.refresh_from_db()
+        self.assertEqual((car.model, car.status), ('Renamed', 'reserved'))
+        with self.assertRaises(CarUnavailable):
+            reserve_car(car, User.objects.create_user('edit_buyer_2', password='pw'), 'cash')
@@ -1,18 +1,22 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import async_views, views
 
 app_name = 'main'
 
+# Under ASGI the public read pages are served by their async versions
+public_views = async_views if settings.ASYNC_PUBLIC_VIEWS else views
+
 urlpatterns = [
     # Public
-    path('', views.home, name='home'),
+    path('', public_views.home, name='home'),
     path('register/', views.register, name='register'),
     path('company/register-request/', views.company_register_request, name='company_register_request'),
     path('login/', views.user_login, name='login'),
     path('logout/', views.user_logout, name='logout'),
-    path('cars/', views.car_list, name='car_list'),
-    path('cars/<int:pk>/', views.car_detail, name='car_detail'),
-    path('parts/', views.part_list, name='part_list'),
+    path('cars/', public_views.car_list, name='car_list'),
+    path('cars/<int:pk>/', public_views.car_detail, name='car_detail'),
+    path('parts/', public_views.part_list, name='part_list'),
 
     # User
     path('cart/', views.cart_view, name='cart'),
@@ -39,6 +43,8 @@ urlpatterns = [
     path('company/parts/add/', views.company_part_add, name='company_part_add'),
     path('company/parts/edit/<int:pk>/', views.company_part_edit, name='company_part_edit'),
     path('company/parts/delete/<int:pk>/', views.company_part_delete, name='company_part_delete'),
+    path('company/import/', views.company_import, name='company_import'),
+    path('company/import/<int:pk>/', views.company_import_detail, name='company_import_detail'),
     path('company/test-drives/', views.company_test_drive_list, name='company_test_drive_list'),
     path('company/test-drives/update/<int:pk>/', views.company_test_drive_update, name='company_test_drive_update'),
     path('company/loans/', views.company_loan_list, name='company_loan_list'),
@@ -59,4 +65,9 @@ urlpatterns = [
     path('dashboard/users/<int:pk>/', views.admin_user_detail, name='admin_user_detail'),
     path('dashboard/all-purchases/', views.admin_all_purchases, name='admin_all_purchases'),
     path('dashboard/all-part-orders/', views.admin_all_part_orders, name='admin_all_part_orders'),
+    path('dashboard/all-purchases/export/', views.admin_export_purchases, name='admin_export_purchases'),
+    path('dashboard/all-part-orders/export/', views.admin_export_part_orders, name='admin_export_part_orders'),
+    path('dashboard/profiling/', views.admin_profiling, name='admin_profiling'),
+    path('dashboard/profiling/connections/', views.admin_db_connections, name='admin_db_connections'),
+    path('dashboard/jobs/', views.admin_jobs, name='admin_jobs'),
 ]
\ No newline at end of file
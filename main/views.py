@@ -1,13 +1,51 @@
 from django.shortcuts import render, redirect, get_object_or_404
+from django.http import HttpResponse, JsonResponse
 from django.contrib.auth import login, logout, authenticate
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib import messages
 from django.contrib.auth.models import User
+from django.db import transaction
 from django.db.models import Q
 from django.utils import timezone
 from .models import (Car, Part, TestDrive, LoanApplication, Cart, CartItem, 
-                     Company, CarPurchase, CompanyRequest, PartOrder, PartOrderItem)
-from .forms import CarForm, PartForm, TestDriveForm, LoanApplicationForm, CompanyForm, CompanyRequestForm
+                     Company, CarPurchase, CompanyRequest, PartOrder, PartOrderItem, ImportJob)
+from . import db_pool, jobs
+from .exports import export_response
+from .facets import car_facet_counts, filter_q, parse_filters, present_facets
+from .forms import (CarForm, PartForm, TestDriveForm, LoanApplicationForm, CompanyForm, CompanyRequestForm,
+                    ImportJobForm)
+from .imports import IMPORT_FORMS, import_columns
+from .page_cache import home_page, is_cacheable
+from .pagination import keyset_paginate, page_querystring, pick_sort, sort_choices
+from .profiling import snapshot as profiling_snapshot
+from .query_budget import query_budget
+from .search import annotate_rank, filter_matches, rank_matches
+from .services import (CarUnavailable, EmptyCart, OutOfStock, checkout_cart, confirm_reservation,
+                       release_reservation, reserve_car)
+from .stats import admin_stats, company_stats
+
+CAR_PAGE_SIZE = 12
+CAR_ORDERING = ('-created_at', '-id')
+# ?sort= options: (label, keyset ordering), the first is the default. Each
+# ordering has a matching (status, column, id) index on Car and
+# (column, id) index on Part.
+CAR_SORTS = {
+    'newest': ('Newest', CAR_ORDERING),
+    'price_asc': ('Price: low to high', ('price', 'id')),
+    'price_desc': ('Price: high to low', ('-price', '-id')),
+    'mileage': ('Lowest mileage', ('mileage', 'id')),
+    'year': ('Year: newest first', ('-year', '-id')),
+}
+PART_PAGE_SIZE = 24
+PART_SORTS = {
+    'newest': ('Newest', ('-created_at', '-id')),
+    'price_asc': ('Price: low to high', ('price', 'id')),
+    'price_desc': ('Price: high to low', ('-price', '-id')),
+}
+# Search results default to best match first (see search.rank_matches)
+CAR_SEARCH_SORTS = {'relevance': ('Best match', ('-search_rank', '-id')), **CAR_SORTS}
+PART_SEARCH_SORTS = {'relevance': ('Best match', ('-search_rank', '-id')), **PART_SORTS}
+CAR_DETAIL_PARTS = 8
 
 # Role check functions
 def is_admin(user):
@@ -20,14 +58,22 @@ def is_regular_user(user):
     return user.is_authenticated and not user.is_staff and not hasattr(user, 'company')
 
 # ==================== PUBLIC VIEWS ====================
+@query_budget(6)
 def home(request):
-    featured_cars = Car.objects.filter(status='available')[:6]
+    # Anonymous visitors share one cached copy, expired by main.signals
+    if is_cacheable(request):
+        return HttpResponse(home_page.get(lambda: render_home(request).content))
+    return render_home(request)
+
+def render_home(request):
+    featured_cars = Car.objects.filter(status='available').order_by(*CAR_ORDERING)[:6]
     companies = Company.objects.all()[:4]
     return render(request, 'main/home.html', {
         'featured_cars': featured_cars,
         'companies': companies
     })
 
+@query_budget(10)
 def register(request):
     if request.method == 'POST':
         username = request.POST['username']
@@ -42,6 +88,7 @@ def register(request):
         return redirect('main:home')
     return render(request, 'main/register.html')
 
+@query_budget(6)
 def company_register_request(request):
     if request.method == 'POST':
         form = CompanyRequestForm(request.POST)
@@ -53,6 +100,7 @@ def company_register_request(request):
         form = CompanyRequestForm()
     return render(request, 'main/company_register_request.html', {'form': form})
 
+@query_budget(10)
 def user_login(request):
     if request.method == 'POST':
         username = request.POST['username']
@@ -69,55 +117,73 @@ def user_login(request):
         messages.error(request, 'Invalid credentials')
     return render(request, 'main/login.html')
 
+@query_budget(4)
 def user_logout(request):
     logout(request)
     messages.success(request, 'Logged out successfully')
     return redirect('main:home')
 
+@query_budget(8)
 def car_list(request):
     cars = Car.objects.filter(status='available')
-    companies = Company.objects.all()
     
     # Search filter
     search_query = request.GET.get('search', '')
     if search_query:
-        cars = cars.filter(
-            Q(model__icontains=search_query) |
-            Q(company__name__icontains=search_query) |
-            Q(color__icontains=search_query)
-        )
+        cars = filter_matches(cars, 'car', search_query)
     
-    # Company filter
-    selected_company = request.GET.get('company')
-    if selected_company:
-        cars = cars.filter(company__id=selected_company)
+    # Facet filters: fuel, color, company, year/price/mileage ranges
+    filters = parse_filters(request.GET)
+    counts = car_facet_counts(cars, filters, search_query)
+    if filters:
+        cars = cars.filter(filter_q(filters))
+    
+    # Keyset pagination in the chosen order; searches can rank by relevance
+    sorts = CAR_SORTS
+    if search_query:
+        cars = annotate_rank(cars, 'car', search_query)
+        sorts = CAR_SEARCH_SORTS
+    sort, ordering = pick_sort(sorts, request.GET.get('sort'))
+    page = keyset_paginate(cars, ordering, CAR_PAGE_SIZE,
+                           after=request.GET.get('after'), before=request.GET.get('before'))
     
     return render(request, 'main/car_list.html', {
-        'cars': cars,
-        'companies': companies,
-        'selected_company': selected_company,
+        'cars': page,
+        'page': page,
+        'page_query': page_querystring(request),
+        'sort_choices': sort_choices(sorts, sort),
+        'facets': present_facets(counts, filters, request.GET),
+        'total': counts['total'],
+        'filtered': bool(filters or search_query),
         'search_query': search_query,
     })
 
+@query_budget(5)
 def car_detail(request, pk):
     car = get_object_or_404(Car, pk=pk)
-    parts = Part.objects.filter(company=car.company)
+    parts = Part.objects.filter(company_id=car.company_id).order_by('-created_at', '-id')[:CAR_DETAIL_PARTS]
     return render(request, 'main/car_detail.html', {'car': car, 'parts': parts})
 
+@query_budget(5)
 def part_list(request):
     parts = Part.objects.all()
     
     # Search filter
     search_query = request.GET.get('search', '')
+    sorts = PART_SORTS
     if search_query:
-        parts = parts.filter(
-            Q(name__icontains=search_query) |
-            Q(category__icontains=search_query) |
-            Q(company__name__icontains=search_query)
-        )
+        parts = rank_matches(parts, 'part', search_query)
+        sorts = PART_SEARCH_SORTS
+    
+    sort, ordering = pick_sort(sorts, request.GET.get('sort'))
+    page = keyset_paginate(parts, ordering, PART_PAGE_SIZE,
+                           after=request.GET.get('after'), before=request.GET.get('before'))
     
     return render(request, 'main/part_list.html', {
-        'parts': parts,
+        'parts': page,
+        'page': page,
+        'page_query': page_querystring(request),
+        'sort_choices': sort_choices(sorts, sort),
         'search_query': search_query,
     })
 
@@ -125,7 +191,7 @@ def part_list(request):
 @login_required
 def cart_view(request):
     cart, created = Cart.objects.get_or_create(user=request.user)
-    return render(request, 'main/cart.html', {'cart': cart})
+    return render(request, 'main/cart.html', {'cart': cart, 'summary': cart.get_summary()})
 
 @login_required
 def add_to_cart(request, part_id):
@@ -168,41 +234,29 @@ def remove_from_cart(request, item_id):
 @login_required
 def checkout_parts(request):
     cart = get_object_or_404(Cart, user=request.user)
-    cart_items = cart.cartitem_set.all()
-    
-    if not cart_items:
-        messages.error(request, 'Your cart is empty!')
-        return redirect('main:cart')
     
     if request.method == 'POST':
         payment_method = request.POST.get('payment_method')
         shipping_address = request.POST.get('shipping_address')
         
-        # Create order
-        order = PartOrder.objects.create(
-            user=request.user,
-            total_amount=cart.get_total(),
-            payment_method=payment_method,
-            shipping_address=shipping_address,
-            status='pending'
-        )
-        
-        # Create order items
-        for item in cart_items:
-            PartOrderItem.objects.create(
-                order=order,
-                part=item.part,
-                quantity=item.quantity,
-                price=item.part.price
-            )
-        
-        # Clear cart
-        cart_items.delete()
+        try:
+            order = checkout_cart(cart, payment_method, shipping_address)
+        except EmptyCart:
+            messages.error(request, 'Your cart is empty!')
+            return redirect('main:cart')
+        except OutOfStock as e:
+            messages.error(request, f'Not enough stock for: {e}. Please update your cart.')
+            return redirect('main:cart')
         
         messages.success(request, f'Order #{order.id} placed successfully!')
         return redirect('main:my_part_orders')
     
-    return render(request, 'main/checkout_parts.html', {'cart': cart})
+    summary = cart.get_summary()
+    if not summary.items:
+        messages.error(request, 'Your cart is empty!')
+        return redirect('main:cart')
+    
+    return render(request, 'main/checkout_parts.html', {'cart': cart, 'summary': summary})
 
 @login_required
 def my_part_orders(request):
@@ -215,16 +269,12 @@ def buy_car(request, car_id):
     if request.method == 'POST':
         payment_method = request.POST.get('payment_method')
         
-        purchase = CarPurchase.objects.create(
-            user=request.user,
-            car=car,
-            total_price=car.price,
-            payment_method=payment_method,
-            status='pending'
-        )
-        car.status = 'reserved'
-        car.save()
-        messages.success(request, f'Purchase request for {car.company.name} {car.model} submitted!')
+        try:
+            reserve_car(car, request.user, payment_method)
+        except CarUnavailable:
+            messages.error(request, 'Sorry, this car has just been reserved by another buyer.')
+            return redirect('main:car_detail', pk=car.pk)
+        messages.success(request, f'Purchase request for {car.company_name} {car.model} submitted!')
         return redirect('main:my_purchases')
     return render(request, 'main/buy_car.html', {'car': car})
 
@@ -303,14 +353,7 @@ def company_dashboard(request):
         messages.error(request, 'Access denied!')
         return redirect('main:home')
     company = request.user.company
-    stats = {
-        'total_cars': Car.objects.filter(company=company).count(),
-        'total_parts': Part.objects.filter(company=company).count(),
-        'pending_test_drives': TestDrive.objects.filter(car__company=company, status='pending').count(),
-        'pending_loans': LoanApplication.objects.filter(car__company=company, status='pending').count(),
-        'car_purchases': CarPurchase.objects.filter(car__company=company).count(),
-        'part_orders': PartOrderItem.objects.filter(part__company=company).count(),
-    }
+    stats = company_stats(company)
     return render(request, 'main/company_dashboard.html', {'company': company, 'stats': stats})
 
 @login_required
@@ -347,7 +390,9 @@ def company_car_edit(request, pk):
     if request.method == 'POST':
         form = CarForm(request.POST, request.FILES, instance=car)
         if form.is_valid():
-            form.save()
+            car = form.save(commit=False)
+            # Leave status alone: a buyer may have reserved the car meanwhile
+            car.save(update_fields=[*form.Meta.fields, 'company_name', 'updated_at'])
             messages.success(request, 'Car updated successfully!')
             return redirect('main:company_car_list')
     else:
@@ -413,6 +458,34 @@ def company_part_delete(request, pk):
     messages.success(request, 'Part deleted!')
     return redirect('main:company_part_list')
 
+@login_required
+def company_import(request):
+    if not hasattr(request.user, 'company'):
+        return redirect('main:home')
+    company = request.user.company
+    if request.method == 'POST':
+        form = ImportJobForm(request.POST, request.FILES)
+        if form.is_valid():
+            with transaction.atomic():
+                job = form.save(commit=False)
+                job.company = company
+                job.save()
+                jobs.enqueue('import', job_id=job.pk)
+            messages.success(request, 'File uploaded, the import runs in the background.')
+            return redirect('main:company_import_detail', pk=job.pk)
+    else:
+        form = ImportJobForm()
+    columns = {kind: import_columns(kind) for kind in IMPORT_FORMS}
+    recent = ImportJob.objects.filter(company=company).order_by('-created_at')[:20]
+    return render(request, 'main/company_import.html', {'form': form, 'jobs': recent, 'columns': columns})
+
+@login_required
+def company_import_detail(request, pk):
+    if not hasattr(request.user, 'company'):
+        return redirect('main:home')
+    job = get_object_or_404(ImportJob, pk=pk, company=request.user.company)
+    return render(request, 'main/company_import_detail.html', {'job': job})
+
 @login_required
 def company_test_drive_list(request):
     if not hasattr(request.user, 'company'):
@@ -473,6 +546,10 @@ def company_update_purchase(request, pk):
         if request.POST.get('status') == 'paid':
             purchase.payment_date = timezone.now()
         purchase.save()
+        if purchase.status in ('paid', 'confirmed'):
+            confirm_reservation(purchase)
+        elif purchase.status == 'cancelled':
+            release_reservation(purchase)
         messages.success(request, 'Purchase status updated!')
         return redirect('main:company_car_purchases')
     return render(request, 'main/company_update_purchase.html', {'purchase': purchase})
@@ -489,15 +566,7 @@ def company_part_orders(request):
 @login_required
 @user_passes_test(is_admin)
 def admin_dashboard(request):
-    stats = {
-        'total_companies': Company.objects.count(),
-        'total_users': User.objects.filter(is_staff=False, company__isnull=True).count(),
-        'pending_test_drives': TestDrive.objects.filter(status='pending').count(),
-        'pending_loans': LoanApplication.objects.filter(status='pending').count(),
-        'pending_company_requests': CompanyRequest.objects.filter(status='pending').count(),
-        'total_car_purchases': CarPurchase.objects.count(),
-        'total_part_orders': PartOrder.objects.count(),
-    }
+    stats = admin_stats()
     return render(request, 'main/admin_dashboard.html', {'stats': stats})
 
 @login_required
@@ -606,28 +675,22 @@ def admin_approve_company(request, pk):
         action = request.POST.get('action')
         
         if action == 'approve':
+            if company_request.status == 'approved':
+                messages.info(request, 'This request is already approved.')
+                return redirect('main:admin_company_requests')
             if User.objects.filter(username=company_request.requested_username).exists():
                 messages.error(request, 'Username already exists! Please reject this request and ask them to choose a different username.')
                 return redirect('main:admin_company_requests')
             
-            user = User.objects.create_user(
-                username=company_request.requested_username,
-                password=company_request.requested_password
-            )
+            # The login is created by a background job: hashing its
+            # password is the slowest part of the request
+            with transaction.atomic():
+                company_request.status = 'approved'
+                company_request.admin_notes = request.POST.get('admin_notes', '')
+                company_request.save()
+                jobs.enqueue('company_account', request_id=company_request.pk)
             
-            company = Company.objects.create(
-                user=user,
-                name=company_request.company_name,
-                country=company_request.country,
-                description=company_request.description,
-                established_year=company_request.established_year
-            )
-            
-            company_request.status = 'approved'
-            company_request.admin_notes = request.POST.get('admin_notes', '')
-            company_request.save()
-            
-            messages.success(request, f'Company {company.name} approved! They can now login with username: {user.username}')
+            messages.success(request, f'Company {company_request.company_name} approved! They can login shortly with username: {company_request.requested_username}')
             
         elif action == 'reject':
             company_request.status = 'rejected'
@@ -643,10 +706,45 @@ def admin_approve_company(request, pk):
 @user_passes_test(is_admin)
 def admin_all_purchases(request):
     purchases = CarPurchase.objects.all().order_by('-purchase_date')
-    return render(request, 'main/admin_all_purchases.html', {'purchases': purchases})
+    return render(request, 'main/admin_all_purchases.html', {
+        'purchases': purchases,
+        'statuses': CarPurchase.STATUS_CHOICES,
+    })
 
 @login_required
 @user_passes_test(is_admin)
 def admin_all_part_orders(request):
     orders = PartOrder.objects.all().order_by('-order_date')
-    return render(request, 'main/admin_all_part_orders.html', {'orders': orders})
\ No newline at end of file
+    return render(request, 'main/admin_all_part_orders.html', {
+        'orders': orders,
+        'statuses': PartOrder.STATUS_CHOICES,
+    })
+
+@login_required
+@user_passes_test(is_admin)
+def admin_export_purchases(request):
+    # ?format=csv|jsonl&from=YYYY-MM-DD&to=YYYY-MM-DD&status=...
+    return export_response(request, 'car_purchases')
+
+@login_required
+@user_passes_test(is_admin)
+def admin_export_part_orders(request):
+    return export_response(request, 'part_orders')
+
+@login_required
+@user_passes_test(is_admin)
+def admin_profiling(request):
+    # Request cost per URL name as seen by this worker process
+    return JsonResponse(profiling_snapshot())
+
+@login_required
+@user_passes_test(is_admin)
+def admin_db_connections(request):
+    # Open and reused database connections of this worker process
+    return JsonResponse(db_pool.snapshot())
+
+@login_required
+@user_passes_test(is_admin)
+def admin_jobs(request):
+    # Background job queue (main.jobs)
+    return JsonResponse(jobs.snapshot())